@@ -1,6 +1,14 @@
 // API endpoint
 const API_URL = 'link/api';
 
+// Resized variants for images uploaded to the API (see imageSrcset)
+const CARD_IMAGE_WIDTH = 640;
+const CARD_IMAGE_SIZES = '(max-width: 768px) 100vw, 400px';
+const MODAL_IMAGE_SIZES = '(max-width: 768px) 100vw, 800px';
+
+// How often the grid checks the change feed when it has no event stream
+const CHANGES_POLL_MS = 30000;
+
 // Function to fetch projects from the API
 async function fetchProjects() {
     try {
@@ -92,11 +100,20 @@ function createProjectCard(project) {
     
     console.log(`Processing image URL for project ${project.id}:`, imageUrl);
     
+    // Let the browser pick the smallest variant that fills the card
+    if (project.imageSrcset) {
+        imgElement.srcset = project.imageSrcset;
+        imgElement.sizes = CARD_IMAGE_SIZES;
+        imgElement.loading = 'lazy';
+        imageUrl = `${imageUrl}?w=${CARD_IMAGE_WIDTH}`;
+    }
+    
     imgElement.src = imageUrl;
     imgElement.alt = project.title;
     imgElement.onerror = function() {
         console.error(`Failed to load image for project ${project.id}:`, imageUrl);
         // Try to load a fallback image
+        this.removeAttribute('srcset');
         this.src = 'https://via.placeholder.com/800x600?text=No+Image+Available';
         this.onerror = function() {
             console.error('Failed to load fallback image');
@@ -123,6 +140,130 @@ function createProjectCard(project) {
     return card;
 }
 
+// Function to attach behaviour to cards rendered by the server
+function hydrateProjects(projectsGrid) {
+    projectsGrid.querySelectorAll('.project-card img').forEach(imgElement => {
+        const handleError = function() {
+            this.removeAttribute('srcset');
+            this.src = 'https://via.placeholder.com/800x600?text=No+Image+Available';
+            this.onerror = function() {
+                this.style.display = 'none';
+            };
+        };
+        // The image may have failed before this script ran
+        if (imgElement.complete && imgElement.naturalWidth === 0) {
+            handleError.call(imgElement);
+        } else {
+            imgElement.onerror = handleError;
+        }
+    });
+}
+
+// Function to keep the grid in sync with the server's event stream. A
+// worker only holds so many streams; when the server refuses one, or the
+// browser has no EventSource, the page polls the change feed instead
+function subscribeToProjectChanges(sinceVersion) {
+    if (!window.EventSource) {
+        watchProjectChanges(sinceVersion);
+        return;
+    }
+    
+    // Resume from the version the page was rendered at so no write is missed
+    let lastVersion = sinceVersion;
+    const query = sinceVersion ? `?last_event_id=${encodeURIComponent(sinceVersion)}` : '';
+    const source = new EventSource(`${API_URL}/projects/stream${query}`);
+    
+    const findCard = (id) => document.querySelector(`.project-card[data-project="${id}"]`);
+    const onChange = (event) => {
+        const change = JSON.parse(event.data);
+        lastVersion = event.lastEventId || lastVersion;
+        applyProjectChanges({
+            reset: false,
+            upserted: change.type === 'deleted' ? [] : [change.data],
+            deleted: change.type === 'deleted' ? [change.id] : [],
+        }, findCard);
+    };
+    source.addEventListener('created', onChange);
+    source.addEventListener('updated', onChange);
+    source.addEventListener('deleted', onChange);
+    
+    // Bulk imports and gaps the stream cannot replay need a full reload
+    source.addEventListener('imported', fetchProjects);
+    source.addEventListener('reset', fetchProjects);
+    
+    source.onerror = () => {
+        // EventSource reconnects by itself after a dropped connection, but
+        // gives up on a refused one (503 when the worker is full)
+        if (source.readyState === EventSource.CLOSED) {
+            watchProjectChanges(lastVersion);
+        }
+    };
+}
+
+// Function to keep the grid in sync by polling the server's change feed;
+// a poll with nothing new is answered from the server's cache
+function watchProjectChanges(sinceVersion) {
+    let token = sinceVersion;
+    
+    const findCard = (id) => document.querySelector(`.project-card[data-project="${id}"]`);
+    
+    const poll = async () => {
+        try {
+            // Hidden tabs catch up in one request when they are shown again
+            while (!document.hidden) {
+                const query = token ? `?since=${encodeURIComponent(token)}` : '';
+                const response = await fetch(`${API_URL}/projects/changes${query}`, { cache: 'no-cache' });
+                if (!response.ok) {
+                    break;
+                }
+                const feed = await response.json();
+                applyProjectChanges(feed, findCard);
+                token = feed.token;
+                if (!feed.hasMore) {
+                    break;
+                }
+            }
+        } catch (error) {
+            console.error('Error polling project changes:', error);
+        }
+        setTimeout(poll, CHANGES_POLL_MS);
+    };
+    setTimeout(poll, CHANGES_POLL_MS);
+}
+
+// Function to apply one page of the change feed to the grid
+function applyProjectChanges(feed, findCard) {
+    // Tokens too old for the feed (or none at all) get every project back
+    if (feed.reset) {
+        displayProjects(feed.upserted);
+        return;
+    }
+    
+    const projectsGrid = document.querySelector('.projects-grid');
+    if (!projectsGrid) {
+        return;
+    }
+    feed.upserted.forEach(project => {
+        const card = findCard(project.id);
+        if (card) {
+            card.replaceWith(createProjectCard(project));
+            return;
+        }
+        // Replace the "no projects" message with the first card
+        const errorMessage = projectsGrid.querySelector('.error-message');
+        if (errorMessage) {
+            errorMessage.remove();
+        }
+        projectsGrid.appendChild(createProjectCard(project));
+    });
+    feed.deleted.forEach(id => {
+        const card = findCard(id);
+        if (card) {
+            card.remove();
+        }
+    });
+}
+
 // Function to show error message
 function showError(message) {
     const projectsGrid = document.querySelector('.projects-grid');
@@ -190,12 +331,19 @@ async function openProjectModal(projectId) {
         }
         
         console.log(`Setting modal image URL:`, imageUrl);
+        if (project.imageSrcset) {
+            modalImage.srcset = project.imageSrcset;
+            modalImage.sizes = MODAL_IMAGE_SIZES;
+        } else {
+            modalImage.removeAttribute('srcset');
+        }
         modalImage.src = imageUrl;
         modalImage.alt = project.title;
         
         // Add error handling for modal image
         modalImage.onerror = function() {
             console.error(`Failed to load modal image:`, imageUrl);
+            this.removeAttribute('srcset');
             this.src = 'https://via.placeholder.com/800x600?text=No+Image+Available';
             this.onerror = function() {
                 console.error('Failed to load fallback image in modal');
@@ -298,4 +446,15 @@ window.onclick = function(event) {
 }
 
 // Initialize projects when the page loads
-document.addEventListener('DOMContentLoaded', fetchProjects); 
+document.addEventListener('DOMContentLoaded', () => {
+    const projectsGrid = document.querySelector('.projects-grid');
+    const renderedVersion = projectsGrid ? projectsGrid.dataset.version : undefined;
+    
+    // Pages served by the API already contain the grid
+    if (renderedVersion !== undefined) {
+        hydrateProjects(projectsGrid);
+    } else {
+        fetchProjects();
+    }
+    subscribeToProjectChanges(renderedVersion);
+}); 
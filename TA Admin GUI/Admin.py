@@ -1,14 +1,12 @@
+import mimetypes
 import customtkinter as ctk
-import requests
-from tkinter import messagebox
-import json
+from tkinter import filedialog, messagebox
+from api_client import ApiClient, EventStream, TaskRunner, OFFLINE_ERRORS
+from local_cache import ProjectCache
 
 API_URL = "link/api"
-
-def get_headers():
-    return {
-        "Content-Type": "application/json"
-    }
+SEARCH_DEBOUNCE_MS = 200
+ROW_HEIGHT = 39  # button height plus vertical padding
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
@@ -43,31 +41,143 @@ class LoginDialog(ctk.CTkToplevel):
         self.login_button.pack(pady=10)
         
         self.result = None
+        self.parent = parent
         
         # Bind Enter key to login
         self.password_entry.bind('<Return>', lambda event: self.login())
         
     def login(self):
-        try:
-            password = self.password_var.get()
-            if not password:
-                messagebox.showerror("Error", "Please enter a password")
-                return
-                
-            response = requests.post(
-                f"{API_URL}/auth/login",
-                json={"password": password},
-                headers=get_headers()
-            )
-            
-            if response.status_code == 200:
-                self.result = True
+        password = self.password_var.get()
+        if not password:
+            messagebox.showerror("Error", "Please enter a password")
+            return
+        
+        self.login_button.configure(state="disabled", text="Logging in...")
+        self.parent.runner.submit(
+            lambda: self.parent.client.call("POST", "/auth/login", json={"password": password}),
+            self.on_login_response,
+            self.on_login_error,
+            channel="login"
+        )
+    
+    def on_login_response(self, response):
+        if response.status == 200:
+            self.parent.client.set_token(response.data.get("access_token"))
+            self.result = True
+            self.destroy()
+        else:
+            self.login_button.configure(state="normal", text="Login")
+            error_msg = (response.data or {}).get('error', 'Invalid password')
+            messagebox.showerror("Error", error_msg)
+    
+    def on_login_error(self, error):
+        self.login_button.configure(state="normal", text="Login")
+        if isinstance(error, OFFLINE_ERRORS) and self.parent.cache.token:
+            if messagebox.askyesno("Offline", "The API is unreachable. Browse cached projects read-only?"):
+                self.result = "offline"
                 self.destroy()
-            else:
-                error_msg = response.json().get('error', 'Invalid password')
-                messagebox.showerror("Error", error_msg)
-        except Exception as e:
-            messagebox.showerror("Error", f"Login failed: {str(e)}")
+            return
+        messagebox.showerror("Error", f"Login failed: {str(error)}")
+
+class ProjectList(ctk.CTkFrame):
+    def __init__(self, parent, on_select, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.on_select = on_select
+        self.items = []  # (project_id, label) for the current filter
+        self.offset = 0
+        self.selected_id = None
+        self.rows = []  # reusable buttons, only enough to fill the view
+        self.row_state = []  # what each button currently shows
+        
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.body.grid_columnconfigure(0, weight=1)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        
+        self.body.bind("<Configure>", lambda event: self.resize(event.height))
+        self.bind_wheel(self.body)
+    
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda event: self.scroll(-1))
+        widget.bind("<Button-5>", lambda event: self.scroll(1))
+    
+    def resize(self, height):
+        visible = max(1, height // ROW_HEIGHT)
+        while len(self.rows) < visible:
+            slot = len(self.rows)
+            btn = ctk.CTkButton(
+                self.body,
+                text="",
+                command=lambda slot=slot: self.on_click(slot),
+                fg_color=("gray70", "gray30"),
+                hover_color=("gray65", "gray35"),
+                anchor="w",
+                height=35
+            )
+            self.bind_wheel(btn)
+            self.rows.append(btn)
+            self.row_state.append(None)
+        while len(self.rows) > visible:
+            self.rows.pop().destroy()
+            self.row_state.pop()
+        self.scroll_to(self.offset)
+    
+    def set_items(self, items, keep_position=True):
+        self.items = items
+        self.scroll_to(self.offset if keep_position else 0)
+    
+    def select(self, project_id):
+        self.selected_id = project_id
+        self.render()
+    
+    def on_click(self, slot):
+        index = self.offset + slot
+        if index < len(self.items):
+            self.on_select(self.items[index][0])
+    
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.items)))
+        elif action == "scroll":
+            step = len(self.rows) if unit == "pages" else 1
+            self.scroll(int(value) * step)
+    
+    def scroll(self, rows):
+        self.scroll_to(self.offset + rows)
+    
+    def scroll_to(self, offset):
+        self.offset = max(0, min(offset, len(self.items) - len(self.rows)))
+        self.render()
+    
+    def render(self):
+        for slot, btn in enumerate(self.rows):
+            index = self.offset + slot
+            state = None
+            if index < len(self.items):
+                project_id, label = self.items[index]
+                state = (project_id, label, project_id == self.selected_id)
+            # Only touch buttons whose content actually changed
+            if state == self.row_state[slot]:
+                continue
+            self.row_state[slot] = state
+            if state is None:
+                btn.grid_remove()
+                continue
+            btn.configure(
+                text=state[1],
+                fg_color=("gray75", "gray25") if state[2] else ("gray70", "gray30")
+            )
+            btn.grid(row=slot, column=0, padx=5, pady=2, sticky="ew")
+        
+        total = len(self.items)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(self.rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
 
 class ProjectManagerApp(ctk.CTk):
     def __init__(self):
@@ -78,19 +188,28 @@ class ProjectManagerApp(ctk.CTk):
         self.grid_columnconfigure((0, 1), weight=1)
         self.grid_rowconfigure((0, 1, 2, 3, 4, 5, 6), weight=1)
         
-        # Show login dialog
-        self.show_login()
+        # Background HTTP workers, results come back through the Tk loop
+        self.client = ApiClient(API_URL)
+        self.runner = TaskRunner(self)
+        self.runner.on_busy_changed = self.set_busy
+        self.events = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Local copy of the catalog, shown before the API answers
+        self.cache = ProjectCache(API_URL)
+        self.offline = False
         
         # Search bar
         self.search_var = ctk.StringVar()
         self.search_entry = ctk.CTkEntry(self, placeholder_text="Search by title...", textvariable=self.search_var)
         self.search_entry.grid(row=0, column=0, columnspan=2, padx=10, pady=(10, 5), sticky="ew")
-        self.search_entry.bind("<KeyRelease>", lambda event: self.load_projects())
+        self.search_entry.bind("<KeyRelease>", lambda event: self.schedule_filter())
+        self.search_job = None
+        self.last_keyword = ""
         
-        # Project List Frame
-        self.project_frame = ctk.CTkScrollableFrame(self, width=300)
-        self.project_frame.grid(row=1, column=0, rowspan=6, padx=10, pady=10, sticky="nsew")
-        self.project_frame.grid_columnconfigure(0, weight=1)
+        # Project List, only the visible rows exist as widgets
+        self.project_list = ProjectList(self, self.on_project_select, width=300)
+        self.project_list.grid(row=1, column=0, rowspan=6, padx=10, pady=10, sticky="nsew")
         
         # Input Fields
         self.title_entry = ctk.CTkEntry(self, placeholder_text="Title")
@@ -99,8 +218,14 @@ class ProjectManagerApp(ctk.CTk):
         self.description_entry = ctk.CTkEntry(self, placeholder_text="Description")
         self.description_entry.grid(row=2, column=1, padx=10, pady=5, sticky="ew")
         
-        self.image_entry = ctk.CTkEntry(self, placeholder_text="Image URL")
-        self.image_entry.grid(row=3, column=1, padx=10, pady=5, sticky="ew")
+        # Image URL, or upload a local file and use the URL the API returns
+        self.image_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.image_frame.grid(row=3, column=1, padx=10, pady=5, sticky="ew")
+        self.image_frame.grid_columnconfigure(0, weight=1)
+        self.image_entry = ctk.CTkEntry(self.image_frame, placeholder_text="Image URL")
+        self.image_entry.grid(row=0, column=0, sticky="ew")
+        self.upload_button = ctk.CTkButton(self.image_frame, text="Upload...", width=90, command=self.upload_image)
+        self.upload_button.grid(row=0, column=1, padx=(5, 0))
         
         self.video_entry = ctk.CTkEntry(self, placeholder_text="Video URL")
         self.video_entry.grid(row=4, column=1, padx=10, pady=5, sticky="ew")
@@ -111,126 +236,293 @@ class ProjectManagerApp(ctk.CTk):
         # Buttons
         self.button_frame = ctk.CTkFrame(self)
         self.button_frame.grid(row=6, column=1, padx=10, pady=10, sticky="ew")
-        self.button_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
+        self.button_frame.grid_columnconfigure((0, 1, 2, 3, 4), weight=1)
         
         ctk.CTkButton(self.button_frame, text="Refresh", command=self.load_projects).grid(row=0, column=0, padx=5)
-        ctk.CTkButton(self.button_frame, text="Add", command=self.add_project).grid(row=0, column=1, padx=5)
-        ctk.CTkButton(self.button_frame, text="Update", command=self.update_project).grid(row=0, column=2, padx=5)
-        ctk.CTkButton(self.button_frame, text="Delete", command=self.delete_project).grid(row=0, column=3, padx=5)
+        self.write_buttons = [
+            ctk.CTkButton(self.button_frame, text="Add", command=self.add_project),
+            ctk.CTkButton(self.button_frame, text="Update", command=self.update_project),
+            ctk.CTkButton(self.button_frame, text="Delete", command=self.delete_project),
+            ctk.CTkButton(self.button_frame, text="Import...", command=self.import_projects),
+        ]
+        for column, btn in enumerate(self.write_buttons, start=1):
+            btn.grid(row=0, column=column, padx=5)
+        self.write_buttons.append(self.upload_button)
+        
+        # Status bar with a progress indicator for in-flight requests
+        self.status_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.status_frame.grid(row=7, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="ew")
+        self.status_frame.grid_columnconfigure(0, weight=1)
+        self.status_label = ctk.CTkLabel(self.status_frame, text="", anchor="w")
+        self.status_label.grid(row=0, column=0, sticky="ew")
+        self.sync_label = ctk.CTkLabel(self.status_frame, text="", anchor="e")
+        self.sync_label.grid(row=0, column=1, padx=5, sticky="e")
+        self.progress_bar = ctk.CTkProgressBar(self.status_frame, mode="indeterminate", width=150)
         
         self.current_project_id = None
-        self.project_buttons = {}  # Store project buttons for reference
-        self.load_projects()
+        self.project_index = []  # (project_id, lowercase title, label)
+        
+        # Render the cached catalog right away, then log in and sync
+        self.show_cached_projects()
+        self.show_login()
+        if self.offline:
+            self.set_offline(True)
+        else:
+            self.load_projects()
+            self.watch_projects()
     
     def show_login(self):
         login_dialog = LoginDialog(self)
         self.wait_window(login_dialog)
         if not login_dialog.result:
-            self.destroy()
+            self.on_close()
             exit()
+        self.offline = login_dialog.result == "offline"
+    
+    def on_close(self):
+        if self.events is not None:
+            self.events.stop()
+        self.runner.shutdown()
+        if not self.offline and "Authorization" in self.client.session.headers:
+            # Revoke the token so it cannot be reused; never block closing on it
+            try:
+                self.client.call("POST", "/auth/logout", timeout=2)
+            except Exception:
+                pass
+        self.client.close()
+        self.cache.close()
+        self.destroy()
+    
+    def set_busy(self, busy):
+        if busy:
+            self.progress_bar.grid(row=0, column=2, padx=5)
+            self.progress_bar.start()
+        else:
+            self.progress_bar.stop()
+            self.progress_bar.grid_remove()
+    
+    def show_error(self, message):
+        return lambda error: messagebox.showerror("Error", f"{message}: {str(error)}")
+    
+    def error_message(self, response):
+        return (response.data or {}).get('error', 'Unknown error')
     
     def on_project_select(self, project_id):
         self.load_project_details(project_id)
     
     def load_project_details(self, project_id):
-        try:
-            response = requests.get(f"{API_URL}/projects/{project_id}", headers=get_headers())
-            if response.status_code == 200:
-                project = response.json()
-                self.current_project_id = project_id
-                self.title_entry.delete(0, "end")
-                self.title_entry.insert(0, project["title"])
-                self.description_entry.delete(0, "end")
-                self.description_entry.insert(0, project["description"])
-                self.image_entry.delete(0, "end")
-                self.image_entry.insert(0, project["imageUrl"])
-                self.video_entry.delete(0, "end")
-                self.video_entry.insert(0, project.get("videoUrl", ""))
-                self.github_entry.delete(0, "end")
-                self.github_entry.insert(0, project.get("githubUrl", ""))
-                
-                # Update button states
-                for pid, btn in self.project_buttons.items():
-                    if pid == project_id:
-                        btn.configure(fg_color=("gray75", "gray25"))
-                    else:
-                        btn.configure(fg_color=("gray70", "gray30"))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load project details: {str(e)}")
+        # The synced cache holds full rows, so selection needs no round trip
+        project = self.cache.get(project_id)
+        if project is not None:
+            self.fill_form(project_id, project)
+            return
+        self.runner.submit(
+            lambda: self.client.call("GET", f"/projects/{project_id}"),
+            lambda response: self.on_project_details(project_id, response),
+            self.show_error("Failed to load project details"),
+            channel="details"
+        )
+    
+    def on_project_details(self, project_id, response):
+        if response.status == 200:
+            self.fill_form(project_id, response.data)
+    
+    def fill_form(self, project_id, project):
+        self.current_project_id = project_id
+        self.title_entry.delete(0, "end")
+        self.title_entry.insert(0, project["title"])
+        self.description_entry.delete(0, "end")
+        self.description_entry.insert(0, project["description"])
+        self.image_entry.delete(0, "end")
+        self.image_entry.insert(0, project["imageUrl"])
+        self.video_entry.delete(0, "end")
+        self.video_entry.insert(0, project.get("videoUrl") or "")
+        self.github_entry.delete(0, "end")
+        self.github_entry.insert(0, project.get("githubUrl") or "")
+        
+        self.project_list.select(project_id)
     
     def load_projects(self):
-        try:
-            response = requests.get(f"{API_URL}/projects", headers=get_headers())
-            if response.status_code == 200:
-                projects = response.json()
-                
-                # Clear existing buttons
-                for widget in self.project_frame.winfo_children():
-                    widget.destroy()
-                self.project_buttons.clear()
-                
-                keyword = self.search_var.get().lower()
-                for p in projects:
-                    if keyword in p["title"].lower():
-                        btn = ctk.CTkButton(
-                            self.project_frame,
-                            text=f"{p['id']}: {p['title']}",
-                            command=lambda pid=p['id']: self.on_project_select(pid),
-                            fg_color=("gray70", "gray30"),
-                            hover_color=("gray65", "gray35"),
-                            anchor="w",
-                            height=35
-                        )
-                        btn.grid(row=len(self.project_buttons), column=0, padx=5, pady=2, sticky="ew")
-                        self.project_buttons[p['id']] = btn
-                        
-                        # Highlight current project if any
-                        if self.current_project_id == p['id']:
-                            btn.configure(fg_color=("gray75", "gray25"))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load projects: {str(e)}")
+        token = self.cache.token
+        self.runner.submit(
+            lambda: self.sync_cache(token),
+            self.on_projects_loaded,
+            self.on_sync_error,
+            channel="projects"
+        )
     
-    def add_project(self):
-        data = {
+    def watch_projects(self):
+        # Every pushed change triggers a delta sync; the "projects" channel
+        # collapses a burst of events into the latest request
+        self.events = EventStream(
+            self.client, "/projects/stream",
+            lambda event_type, data: self.runner.post(self.load_projects)
+        )
+        self.events.start()
+    
+    def sync_cache(self, token):
+        # Runs on a worker thread: pull pages of changes until caught up
+        while True:
+            params = {"since": token} if token else {}
+            response = self.client.call("GET", "/projects/changes", params=params)
+            if response.status != 200:
+                raise RuntimeError(self.error_message(response))
+            self.cache.apply(response.data)
+            token = response.data["token"]
+            if not response.data["hasMore"]:
+                return self.cache.index()
+    
+    def on_projects_loaded(self, rows):
+        self.set_offline(False)
+        self.set_project_index(rows)
+    
+    def on_sync_error(self, error):
+        if isinstance(error, OFFLINE_ERRORS):
+            self.set_offline(True)
+        else:
+            messagebox.showerror("Error", f"Failed to load projects: {str(error)}")
+    
+    def show_cached_projects(self):
+        self.set_project_index(self.cache.index())
+        synced_at = self.cache.synced_at
+        if synced_at:
+            self.sync_label.configure(text=f"Cached {synced_at:%Y-%m-%d %H:%M}, refreshing...")
+    
+    def set_project_index(self, rows):
+        self.project_index = [
+            (project_id, title.lower(), f"{project_id}: {title}")
+            for project_id, title in rows
+        ]
+        self.apply_filter()
+    
+    def set_offline(self, offline):
+        self.offline = offline
+        for btn in self.write_buttons:
+            btn.configure(state="disabled" if offline else "normal")
+        synced_at = self.cache.synced_at
+        if offline:
+            as_of = f"{synced_at:%Y-%m-%d %H:%M}" if synced_at else "never synced"
+            self.title("Project Manager (offline, read-only)")
+            self.sync_label.configure(text=f"Offline - cached data from {as_of}", text_color="orange")
+        else:
+            self.title("Project Manager")
+            self.sync_label.configure(text=f"Synced {synced_at:%H:%M}", text_color=("gray10", "gray90"))
+    
+    def schedule_filter(self):
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DEBOUNCE_MS, self.apply_filter)
+    
+    def apply_filter(self):
+        self.search_job = None
+        keyword = self.search_var.get().strip().lower()
+        items = [
+            (pid, label) for pid, title, label in self.project_index
+            if keyword in title
+        ]
+        # A new search starts at the top, a refresh keeps the scroll position
+        self.project_list.select(self.current_project_id)
+        self.project_list.set_items(items, keep_position=keyword == self.last_keyword)
+        self.last_keyword = keyword
+        self.status_label.configure(text=f"{len(items)} of {len(self.project_index)} projects")
+    
+    def get_form_data(self):
+        return {
             "title": self.title_entry.get(),
             "description": self.description_entry.get(),
             "image_url": self.image_entry.get(),
             "video_url": self.video_entry.get(),
             "github_url": self.github_entry.get(),
         }
-        try:
-            response = requests.post(f"{API_URL}/projects", json=data, headers=get_headers())
-            if response.status_code == 201:
-                messagebox.showinfo("Success", "Project added successfully!")
-                self.clear_inputs()
-                self.load_projects()
-            else:
-                messagebox.showerror("Error", f"Failed to add project: {response.json().get('error', 'Unknown error')}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add project: {str(e)}")
+    
+    def upload_image(self):
+        path = filedialog.askopenfilename(
+            title="Choose project image",
+            filetypes=[("Images", "*.jpg *.jpeg *.png *.gif *.webp")]
+        )
+        if not path:
+            return
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        
+        def upload():
+            with open(path, "rb") as f:
+                return self.client.call("POST", "/images", data=f.read(), headers={"Content-Type": mimetype})
+        
+        self.runner.submit(upload, self.on_image_uploaded, self.show_error("Failed to upload image"))
+    
+    def on_image_uploaded(self, response):
+        if response.status == 201:
+            # The API resizes stored images for the website's cards
+            self.image_entry.delete(0, "end")
+            self.image_entry.insert(0, response.data["url"])
+        else:
+            messagebox.showerror("Error", f"Failed to upload image: {self.error_message(response)}")
+    
+    def import_projects(self):
+        path = filedialog.askopenfilename(
+            title="Choose projects to import",
+            filetypes=[("JSON lines", "*.ndjson *.jsonl"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        
+        def upload():
+            # Streamed from disk; the session sends the login token with it
+            with open(path, "rb") as f:
+                return self.client.call(
+                    "POST", "/projects/import", data=f,
+                    headers={"Content-Type": "application/x-ndjson"}, timeout=300
+                )
+        
+        self.runner.submit(upload, self.on_projects_imported, self.show_error("Failed to import projects"))
+    
+    def on_projects_imported(self, response):
+        if response.status == 200:
+            report = response.data
+            messagebox.showinfo(
+                "Import",
+                f"{report['inserted']} added, {report['updated']} updated, {report['failed']} failed"
+            )
+            self.load_projects()
+        else:
+            messagebox.showerror("Error", f"Failed to import projects: {self.error_message(response)}")
+    
+    def add_project(self):
+        data = self.get_form_data()
+        self.runner.submit(
+            lambda: self.client.call("POST", "/projects", json=data),
+            self.on_project_added,
+            self.show_error("Failed to add project")
+        )
+    
+    def on_project_added(self, response):
+        if response.status == 201:
+            messagebox.showinfo("Success", "Project added successfully!")
+            self.clear_inputs()
+            self.load_projects()
+        else:
+            messagebox.showerror("Error", f"Failed to add project: {self.error_message(response)}")
     
     def update_project(self):
         if not self.current_project_id:
             messagebox.showwarning("Warning", "Please select a project to update")
             return
-            
-        data = {
-            "title": self.title_entry.get(),
-            "description": self.description_entry.get(),
-            "image_url": self.image_entry.get(),
-            "video_url": self.video_entry.get(),
-            "github_url": self.github_entry.get(),
-        }
-        try:
-            response = requests.put(f"{API_URL}/projects/{self.current_project_id}", json=data, headers=get_headers())
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Project updated successfully!")
-                self.clear_inputs()
-                self.load_projects()
-            else:
-                messagebox.showerror("Error", f"Failed to update project: {response.json().get('error', 'Unknown error')}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update project: {str(e)}")
+        
+        project_id = self.current_project_id
+        data = self.get_form_data()
+        self.runner.submit(
+            lambda: self.client.call("PUT", f"/projects/{project_id}", json=data),
+            self.on_project_updated,
+            self.show_error("Failed to update project")
+        )
+    
+    def on_project_updated(self, response):
+        if response.status == 200:
+            messagebox.showinfo("Success", "Project updated successfully!")
+            self.clear_inputs()
+            self.load_projects()
+        else:
+            messagebox.showerror("Error", f"Failed to update project: {self.error_message(response)}")
     
     def delete_project(self):
         if not self.current_project_id:
@@ -238,23 +530,22 @@ class ProjectManagerApp(ctk.CTk):
             return
             
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this project?"):
-            try:
-                response = requests.delete(
-                    f"{API_URL}/projects/{self.current_project_id}",
-                    headers=get_headers()
-                )
-                
-                if response.status_code == 200:
-                    messagebox.showinfo("Success", "Project deleted successfully!")
-                    self.clear_inputs()
-                    self.load_projects()
-                elif response.status_code == 404:
-                    messagebox.showerror("Error", "Project not found")
-                else:
-                    error_msg = response.json().get('error', 'Unknown error')
-                    messagebox.showerror("Error", f"Failed to delete project: {error_msg}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to delete project: {str(e)}")
+            project_id = self.current_project_id
+            self.runner.submit(
+                lambda: self.client.call("DELETE", f"/projects/{project_id}"),
+                self.on_project_deleted,
+                self.show_error("Failed to delete project")
+            )
+    
+    def on_project_deleted(self, response):
+        if response.status == 200:
+            messagebox.showinfo("Success", "Project deleted successfully!")
+            self.clear_inputs()
+            self.load_projects()
+        elif response.status == 404:
+            messagebox.showerror("Error", "Project not found")
+        else:
+            messagebox.showerror("Error", f"Failed to delete project: {self.error_message(response)}")
     
     def clear_inputs(self):
         self.current_project_id = None
@@ -265,8 +556,7 @@ class ProjectManagerApp(ctk.CTk):
         self.github_entry.delete(0, "end")
         
         # Reset button colors
-        for btn in self.project_buttons.values():
-            btn.configure(fg_color=("gray70", "gray30"))
+        self.project_list.select(None)
 
 if __name__ == "__main__":
     app = ProjectManagerApp()
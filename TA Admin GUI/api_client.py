@@ -0,0 +1,214 @@
+import logging
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+ApiResponse = namedtuple("ApiResponse", ["status", "data"])
+
+# Failures that mean the API is unreachable rather than refusing the request
+OFFLINE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.RetryError)
+
+class ApiClient:
+    def __init__(self, base_url, timeout=(3.05, 15), pool_size=4, retries=3):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+        # Retry connection errors and gateway failures; POST is left out
+        # because creating a project is not idempotent
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "PUT", "DELETE"]),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        # One keep-alive session shared by every worker thread
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def set_token(self, token):
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        else:
+            self.session.headers.pop("Authorization", None)
+
+    def call(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        # Decode on the worker thread so the Tk loop only gets plain data
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return ApiResponse(response.status_code, data)
+
+    def close(self):
+        self.session.close()
+
+class EventStream:
+    # Reads the API's server-sent events on a daemon thread and reconnects
+    # with Last-Event-ID, so no event is lost across a dropped connection
+    def __init__(self, client, path, on_event, max_backoff=30):
+        self.client = client
+        self.path = path
+        self.on_event = on_event
+        self.max_backoff = max_backoff
+        self.last_event_id = None
+        self._stopped = threading.Event()
+        self._response = None
+        self._thread = threading.Thread(target=self._run, name="event-stream", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def _run(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            try:
+                self._read()
+                backoff = 1
+            except Exception:
+                if self._stopped.is_set():
+                    return
+            # The server drops slow readers; wait a little before resuming
+            self._stopped.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _read(self):
+        headers = {"Accept": "text/event-stream"}
+        if "Authorization" in self.client.session.headers:
+            headers["Authorization"] = self.client.session.headers["Authorization"]
+        if self.last_event_id is not None:
+            headers["Last-Event-ID"] = self.last_event_id
+        # A dedicated connection: a long-lived stream must not tie up the shared pool.
+        # The read timeout only has to outlast the server's heartbeat
+        with requests.get(
+            f"{self.client.base_url}{self.path}", headers=headers, stream=True, timeout=(3.05, 60)
+        ) as response:
+            self._response = response
+            response.raise_for_status()
+            event_type, data = "message", []
+            for line in response.iter_lines(decode_unicode=True):
+                if self._stopped.is_set():
+                    return
+                if not line:
+                    if data:
+                        self.on_event(event_type, "\n".join(data))
+                    event_type, data = "message", []
+                elif line.startswith(":"):
+                    continue
+                else:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "event":
+                        event_type = value
+                    elif field == "data":
+                        data.append(value)
+                    elif field == "id":
+                        self.last_event_id = value
+
+class TaskRunner:
+    def __init__(self, widget, max_workers=4, poll_ms=30):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self.results = queue.Queue()
+        self.callbacks = queue.Queue()
+        self.generations = {}
+        self.futures = {}
+        self.pending = 0
+        self.on_busy_changed = None
+        self._closed = False
+        self.widget.after(self.poll_ms, self._poll)
+
+    def submit(self, fn, on_success, on_error=None, channel=None):
+        generation = None
+        if channel is not None:
+            # A newer request on the same channel makes the older one stale
+            self.cancel(channel)
+            generation = self.generations[channel]
+
+        future = self.executor.submit(fn)
+        if channel is not None:
+            self.futures[channel] = future
+        self._set_pending(self.pending + 1)
+        # Worker threads must not touch Tk; hand the result to the poll loop
+        future.add_done_callback(
+            lambda f: self.results.put((channel, generation, f, on_success, on_error))
+        )
+        return future
+
+    def post(self, callback):
+        # Safe from any thread: run callback on the Tk loop
+        self.callbacks.put(callback)
+
+    def cancel(self, channel):
+        self.generations[channel] = self.generations.get(channel, 0) + 1
+        future = self.futures.pop(channel, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        self._closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _set_pending(self, pending):
+        was_busy = self.pending > 0
+        self.pending = pending
+        if self.on_busy_changed and was_busy != (pending > 0):
+            self.on_busy_changed(pending > 0)
+
+    def _poll(self):
+        if self._closed:
+            return
+        try:
+            while True:
+                try:
+                    callback = self.callbacks.get_nowait()
+                except queue.Empty:
+                    break
+                self._run(callback)
+            while True:
+                try:
+                    channel, generation, future, on_success, on_error = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self._set_pending(self.pending - 1)
+                if future.cancelled():
+                    continue
+                if channel is not None:
+                    if generation != self.generations.get(channel):
+                        continue
+                    self.futures.pop(channel, None)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if on_error:
+                        self._run(on_error, e)
+                    continue
+                self._run(on_success, result)
+        finally:
+            # A failing callback must not stop the loop that delivers the rest
+            self.widget.after(self.poll_ms, self._poll)
+
+    def _run(self, callback, *args):
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception("Task callback failed")
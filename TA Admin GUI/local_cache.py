@@ -0,0 +1,90 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".teraarc-admin", "cache.db")
+
+class ProjectCache:
+    def __init__(self, api_url, path=None):
+        self.path = path or os.getenv("TERAARC_ADMIN_CACHE", DEFAULT_CACHE_PATH)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # Shared by the Tk thread (reads) and the sync worker (writes)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS projects (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+
+        # A cache filled from another API is useless, start from scratch
+        if self.get_meta("api_url") != api_url:
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM projects")
+                self.conn.execute("DELETE FROM meta")
+                self._set_meta("api_url", api_url)
+
+    def get_meta(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    @property
+    def token(self):
+        return self.get_meta("token")
+
+    @property
+    def synced_at(self):
+        value = self.get_meta("synced_at")
+        return datetime.fromisoformat(value) if value else None
+
+    def index(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, title FROM projects ORDER BY CAST(id AS INTEGER)"
+            ).fetchall()
+
+    def get(self, project_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM projects WHERE id = ?", (str(project_id),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def apply(self, feed):
+        # Applies one page of /projects/changes in a single transaction
+        with self.lock, self.conn:
+            if feed["reset"]:
+                self.conn.execute("DELETE FROM projects")
+            self.conn.executemany(
+                "INSERT INTO projects (id, title, data) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET title = excluded.title, data = excluded.data",
+                [(p["id"], p["title"], json.dumps(p)) for p in feed["upserted"]]
+            )
+            self.conn.executemany(
+                "DELETE FROM projects WHERE id = ?",
+                [(project_id,) for project_id in feed["deleted"]]
+            )
+            self._set_meta("token", feed["token"])
+            self._set_meta("synced_at", datetime.now().isoformat(timespec="seconds"))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
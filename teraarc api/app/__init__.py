@@ -1,21 +1,41 @@
 import os
-from flask import Flask, jsonify
+import click
+from flask import Flask, current_app, jsonify
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import timedelta
-from .models import db
+from .models import db, init_db, verify_schema
 from .routes import api
+from .pages import pages
+from .cache import response_cache
+from .metrics import metrics
+from .logs import init_logging
+from .events import broker
+from .images import image_store
+from .compression import compression
+from .ratelimit import limiter
+from .replica import router
+from .auth import CachingJWTManager, init_auth
+from .sqlite import configure_sqlite, dispose_after_fork
+from .serializers import init_json
 from .config import config, INSTANCE_PATH
 
-migrate = Migrate()
-jwt = JWTManager()
+jwt = CachingJWTManager()
 
 def create_app(config_name='default'):
     app = Flask(__name__, instance_path=INSTANCE_PATH)
     
     # Load configuration
     app.config.from_object(config[config_name])
+    os.makedirs(app.instance_path, exist_ok=True)
+    if app.config['PROXY_FIX_X_FOR']:
+        # remote_addr (rate limits, access log) becomes the client's address
+        hops = app.config['PROXY_FIX_X_FOR']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+    
+    # JSON logs through a background thread; first, so every later hook's
+    # log lines carry the request id
+    init_logging(app)
     
     # JWT Configuration
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=1)  # Token expires in 1 day
@@ -25,15 +45,27 @@ def create_app(config_name='default'):
     app.config['JWT_ERROR_MESSAGE_KEY'] = 'error'
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
     
+    # Faster JSON encoding for every jsonify() call
+    init_json(app)
+    
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Only the flask CLI needs Flask-Migrate (flask db ...); importing it
+    # pulls in alembic, a large share of a server's startup time
+    cli = click.get_current_context(silent=True) is not None
+    if cli:
+        init_migrate(app)
     jwt.init_app(app)
+    init_auth(jwt)
+    response_cache.max_entries = app.config['RESPONSE_CACHE_SIZE']
+    broker.init_app(app)
+    image_store.init_app(app)
+    compression.init_app(app)
     
     # JWT error handlers
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
-        print(f"Token expired: {jwt_payload}")
+        current_app.logger.info("Token expired", extra={"jti": jwt_payload.get("jti"), "sample": True})
         return jsonify({
             'error': 'The token has expired',
             'message': 'Please log in again'
@@ -41,7 +73,7 @@ def create_app(config_name='default'):
 
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
-        print(f"Invalid token: {error}")
+        current_app.logger.info("Invalid token", extra={"reason": str(error), "sample": True})
         return jsonify({
             'error': 'Invalid token',
             'message': 'Please log in again'
@@ -49,7 +81,7 @@ def create_app(config_name='default'):
 
     @jwt.unauthorized_loader
     def unauthorized_callback(error):
-        print(f"Unauthorized: {error}")
+        current_app.logger.info("Missing token", extra={"reason": str(error), "sample": True})
         return jsonify({
             'error': 'Missing token',
             'message': 'Please log in'
@@ -60,15 +92,50 @@ def create_app(config_name='default'):
         r"/api/*": {
             "origins": "*",
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "X-Data-Version"],
+            "expose_headers": ["ETag", "Link", "X-Next-Cursor", "X-Request-ID", "X-Data-Version"]
         }
     })
     
     # Register blueprints
     app.register_blueprint(api, url_prefix='/api')
+    app.register_blueprint(pages)
     
-    # Create database tables
+    # Tune SQLite connections, create or check the database tables and hook
+    # request/SQL metrics into every engine
     with app.app_context():
-        db.create_all()
+        engines = list(db.engines.values())
+        configure_sqlite(app, engines)
+        create = app.config['DB_CREATE_ON_STARTUP']
+        if cli:
+            # flask db upgrade must find the tables missing, so the CLI only
+            # creates them when DB_CREATE_ON_STARTUP=1 is set explicitly
+            create = os.getenv('DB_CREATE_ON_STARTUP') == '1'
+        if create:
+            init_db()
+        elif not cli:
+            # flask db upgrade has to load the app while the schema is behind
+            verify_schema(app.config['MIGRATIONS_DIR'])
+        metrics.init_app(app, engines)
+        dispose_after_fork(engines)
+    
+    # After the schema exists: a missing replica file is created from the primary
+    router.init_app(app)
     
-    return app 
\ No newline at end of file
+    # After metrics, so rejected requests are still counted and timed
+    limiter.init_app(app)
+    
+    return app
+
+def init_migrate(app):
+    from flask_migrate import Migrate
+    # Batch mode lets migrations alter SQLite tables (copy and swap)
+    Migrate(
+        app, db, directory=app.config['MIGRATIONS_DIR'],
+        render_as_batch=True, include_object=include_object
+    )
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The search index (projects_fts and its shadow tables) is raw SQL that
+    # autogenerate would otherwise offer to drop
+    return not (type_ == 'table' and name.startswith('projects_fts'))
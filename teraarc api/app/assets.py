@@ -0,0 +1,240 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip variants are written without it
+    brotli = None
+
+MANIFEST = "manifest.json"
+
+# Minified and content-hashed; everything else is copied as is
+FINGERPRINTED = (".css", ".js")
+COMPRESSIBLE = (".css", ".js", ".html", ".svg", ".json", ".txt")
+# Precompressed variants smaller than this saving are not worth a file
+MIN_SAVING = 0.1
+
+# Debug logging removed from production bundles; warnings and errors stay
+DEBUG_CALLS = ("console.log(", "console.debug(")
+# A "/" after one of these starts a regex literal rather than a division
+REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+
+def skip_quoted(source, i):
+    # Returns the index just past the string or template literal starting at i
+    quote = source[i]
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        if quote == "`" and source.startswith("${", i):
+            i = skip_braces(source, i + 1)
+            continue
+        i += 1
+    return i
+
+def skip_braces(source, i):
+    # i points at "{"; returns the index just past the matching "}"
+    depth = 0
+    while i < len(source):
+        char = source[i]
+        if char in "'\"`":
+            i = skip_quoted(source, i)
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+def skip_call(source, i):
+    # i points at "("; returns the index just past the matching ")"
+    depth = 0
+    while i < len(source):
+        char = source[i]
+        if char in "'\"`":
+            i = skip_quoted(source, i)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+def last_significant(out):
+    for chunk in reversed(out):
+        stripped = chunk.rstrip()
+        if stripped:
+            return stripped[-1]
+    return ""
+
+def minify_js(source):
+    # Conservative: drops comments, debug calls and indentation but keeps
+    # line breaks, so automatic semicolon insertion behaves exactly as before
+    out = []
+    literals = []
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char in "'\"`":
+            # Set aside so the whitespace pass below cannot touch string contents
+            end = skip_quoted(source, i)
+            out.append(f"\0{len(literals)}\0")
+            literals.append(source[i:end])
+            i = end
+        elif source.startswith("//", i):
+            end = source.find("\n", i)
+            i = len(source) if end == -1 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = len(source) if end == -1 else end + 2
+        elif char == "/" and last_significant(out) in REGEX_PREFIX | {""}:
+            end = i + 1
+            in_class = False
+            while end < len(source) and source[end] != "\n":
+                if source[end] == "\\":
+                    end += 2
+                    continue
+                if source[end] == "[":
+                    in_class = True
+                elif source[end] == "]":
+                    in_class = False
+                elif source[end] == "/" and not in_class:
+                    break
+                end += 1
+            out.append(source[i:end + 1])
+            i = end + 1
+        elif source.startswith(DEBUG_CALLS, i) and (i == 0 or not (source[i - 1].isalnum() or source[i - 1] in "_$.")):
+            end = skip_call(source, source.index("(", i))
+            previous = last_significant(out)
+            if previous in ("", ";", "{", "}"):
+                # A statement of its own: drop it with its semicolon
+                if source.startswith(";", end):
+                    end += 1
+            else:
+                # Used as an expression (e.g. an arrow body), keep it valid
+                out.append("void 0")
+            i = end
+        else:
+            out.append(char)
+            i += 1
+    lines = (line.strip() for line in "".join(out).splitlines())
+    code = "\n".join(line for line in lines if line) + "\n"
+    return re.sub(r"\0(\d+)\0", lambda m: literals[int(m.group(1))], code)
+
+CSS_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+
+def minify_css(source):
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.DOTALL)
+    # Odd parts are string literals (e.g. content values) and stay untouched
+    parts = CSS_STRING.split(source)
+    for index in range(0, len(parts), 2):
+        part = re.sub(r"\s+", " ", parts[index])
+        # Spaces inside calc() are significant, so only punctuation is trimmed
+        part = re.sub(r"\s*([{};,>])\s*", r"\1", part)
+        part = re.sub(r":\s+", ":", part)
+        parts[index] = part.replace(";}", "}")
+    return "".join(parts).strip() + "\n"
+
+def minify_html(source):
+    # Keeps the projects:start/end markers used by the server-side renderer
+    source = re.sub(r"<!--(?! projects:).*?-->", "", source, flags=re.DOTALL)
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line) + "\n"
+
+def fingerprint(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    base, ext = os.path.splitext(path)
+    return f"{base}.{digest}{ext}"
+
+def rewrite_references(html, manifest):
+    # Only local href/src attributes; absolute and CDN URLs never match
+    def replace(match):
+        attribute, quote, url = match.groups()
+        target = manifest.get(url.lstrip("./"))
+        return f"{attribute}={quote}{target or url}{quote}" if target else match.group(0)
+    return re.sub(r"""\b(href|src)=(["'])([^"'#?:]+)\2""", replace, html)
+
+def write_compressed(path, content):
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    for suffix, data in variants.items():
+        if len(data) <= len(content) * (1 - MIN_SAVING):
+            with open(path + suffix, "wb") as f:
+                f.write(data)
+
+def build(source_dir, output_dir):
+    # Builds into a temporary sibling and swaps it in, so a running server
+    # never sees a half-written tree
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".assets-", dir=parent)
+    os.chmod(staging, 0o755)
+
+    files = []
+    for root, _, names in os.walk(source_dir):
+        for name in names:
+            files.append(os.path.relpath(os.path.join(root, name), source_dir).replace(os.sep, "/"))
+
+    manifest = {}
+    outputs = {}
+    for path in sorted(files):
+        with open(os.path.join(source_dir, path), "rb") as f:
+            content = f.read()
+        if path.endswith(".js"):
+            content = minify_js(content.decode("utf-8")).encode("utf-8")
+        elif path.endswith(".css"):
+            content = minify_css(content.decode("utf-8")).encode("utf-8")
+        if path.endswith(FINGERPRINTED):
+            manifest[path] = fingerprint(path, content)
+            outputs[manifest[path]] = content
+        elif not path.endswith(".html"):
+            outputs[path] = content
+
+    # Pages last: they reference the fingerprinted names
+    for path in files:
+        if path.endswith(".html"):
+            with open(os.path.join(source_dir, path), encoding="utf-8") as f:
+                html = minify_html(f.read())
+            outputs[path] = rewrite_references(html, manifest).encode("utf-8")
+
+    for path, content in outputs.items():
+        target = os.path.join(staging, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content)
+        if path.endswith(COMPRESSIBLE):
+            write_compressed(target, content)
+    with open(os.path.join(staging, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    previous = None
+    if os.path.exists(output_dir):
+        previous = f"{staging}.old"
+        os.replace(output_dir, previous)
+    os.replace(staging, output_dir)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,80 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from flask import jsonify
+from flask_jwt_extended import JWTManager
+from flask_jwt_extended.config import config as jwt_config
+from .models import RevokedToken
+from .metrics import metrics
+
+class ClaimsCache:
+    # Claims of tokens whose signature has already been verified, keyed by a
+    # hash of the token so the cache never holds usable credentials
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, leeway=0):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, expires = entry
+            if expires is not None and time.time() >= expires + leeway:
+                # Past expiry: verify again so the usual expired error is raised
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(claims)
+
+    def set(self, key, claims):
+        expires = claims.get("exp")
+        with self._lock:
+            self._entries[key] = (dict(claims), expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class CachingJWTManager(JWTManager):
+    # Signature verification happens once per token and worker; expiry is
+    # rechecked on every hit and the blocklist is consulted on every request
+    def __init__(self, app=None):
+        self.claims_cache = ClaimsCache()
+        super().__init__(app)
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.claims_cache.max_entries = app.config["JWT_CLAIMS_CACHE_SIZE"]
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if csrf_value is not None or allow_expired or not self.claims_cache.max_entries:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = hashlib.sha256(encoded_token.encode()).digest()
+        claims = self.claims_cache.get(key, jwt_config.leeway)
+        if claims is not None:
+            metrics.inc("jwt_claims_cache_total", (("result", "hit"),))
+            return claims
+        metrics.inc("jwt_claims_cache_total", (("result", "miss"),))
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        self.claims_cache.set(key, claims)
+        return claims
+
+def init_auth(jwt):
+    @jwt.token_in_blocklist_loader
+    def token_revoked(jwt_header, jwt_payload):
+        jti = jwt_payload.get("jti")
+        return jti is not None and RevokedToken.is_revoked(jti)
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'error': 'The token has been revoked',
+            'message': 'Please log in again'
+        }), 401
@@ -0,0 +1,178 @@
+import json
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import db, Project, DataVersion, ProjectChange, ProjectEvent
+from .serializers import projects_table, project_select, rows_to_dicts
+from .sqlite import call_with_retry
+
+DIALECT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+# Row keys accepted on import: API names from the export plus column names
+IMPORT_KEYS = {**Project.API_FIELDS, **{column: column for column in Project.API_FIELDS.values()}}
+MAX_REPORTED_ERRORS = 1000
+
+def export_lines(chunk_size):
+    keys, query = project_select()
+    dumps = current_app.json.dumps
+    # yield_per streams from the cursor in chunks instead of loading every row
+    result = db.session.execute(
+        query.order_by(projects_table.c.id).execution_options(yield_per=chunk_size)
+    )
+    for partition in result.partitions():
+        yield "".join(dumps(row) + "\n" for row in rows_to_dicts(keys, partition))
+
+def parse_datetime(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return None
+
+def parse_line(line):
+    try:
+        raw = json.loads(line)
+    except ValueError as e:
+        return None, [f"Invalid JSON: {e}"]
+    if not isinstance(raw, dict):
+        return None, ["Each line must be a JSON object"]
+
+    data = {IMPORT_KEYS[key]: value for key, value in raw.items() if key in IMPORT_KEYS}
+    errors = Project.validate(data)
+    if data.get("id") is not None:
+        try:
+            data["id"] = int(data["id"])
+        except (TypeError, ValueError):
+            errors.append("id must be an integer")
+    else:
+        data.pop("id", None)
+
+    now = datetime.utcnow()
+    data["created_at"] = parse_datetime(data.get("created_at")) or now
+    data["updated_at"] = parse_datetime(data.get("updated_at")) or now
+    data.setdefault("video_url", None)
+    data.setdefault("github_url", None)
+    return data, errors
+
+class ImportReport:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+
+    def fail(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "errors": errors})
+
+    def to_dict(self):
+        return {
+            "dryRun": self.dry_run,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+            "errorsTruncated": self.failed > len(self.errors),
+        }
+
+def write_batch(batch):
+    dialect = db.engine.dialect.name
+    insert = DIALECT_INSERTS[dialect]
+
+    with_id = [row for _, row in batch if "id" in row]
+    without_id = [row for _, row in batch if "id" not in row]
+
+    existing = set()
+    if with_id:
+        existing = set(db.session.execute(
+            db.select(projects_table.c.id).where(projects_table.c.id.in_([row["id"] for row in with_id]))
+        ).scalars())
+
+    ids = []
+    if with_id:
+        statement = insert(projects_table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[projects_table.c.id],
+            set_={
+                column: statement.excluded[column]
+                for column in ("title", "description", "image_url", "video_url", "github_url", "updated_at")
+            }
+        )
+        db.session.execute(statement, with_id)
+        ids.extend(row["id"] for row in with_id)
+    if without_id:
+        ids.extend(db.session.execute(
+            insert(projects_table).returning(projects_table.c.id), without_id
+        ).scalars())
+
+    # One data version for the whole batch, recorded for every touched row
+    version = DataVersion.bump()
+    now = datetime.utcnow()
+    changes = insert(ProjectChange.__table__)
+    changes = changes.on_conflict_do_update(
+        index_elements=[ProjectChange.__table__.c.project_id],
+        set_={column: changes.excluded[column] for column in ("version", "deleted", "changed_at")}
+    )
+    db.session.execute(changes, [
+        {"project_id": project_id, "version": version, "deleted": False, "changed_at": now}
+        for project_id in ids
+    ])
+    # Stream clients get one event per batch and resync through the change feed
+    db.session.add(ProjectEvent(
+        version=version,
+        type="imported",
+        payload=json.dumps({"count": len(ids)}),
+        created_at=now
+    ))
+    db.session.commit()
+
+    updated = len(existing)
+    return len(ids) - updated, updated
+
+def import_lines(lines, batch_size, dry_run=False):
+    report = ImportReport(dry_run)
+    batch = []
+
+    def flush():
+        report.batches += 1
+        try:
+            inserted, updated = call_with_retry(lambda: write_batch(batch))
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception("Import batch %d failed", report.batches)
+            for line_number, _ in batch:
+                report.fail(line_number, [f"Batch failed: {e.__class__.__name__}"])
+            return
+        report.inserted += inserted
+        report.updated += updated
+
+    for line_number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        if not line.strip():
+            continue
+        report.processed += 1
+        data, errors = parse_line(line)
+        if errors:
+            report.fail(line_number, errors)
+            continue
+        if dry_run:
+            continue
+        batch.append((line_number, data))
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+
+    if batch:
+        flush()
+    return report
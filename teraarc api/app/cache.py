@@ -0,0 +1,85 @@
+import hashlib
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from flask import current_app, make_response, request
+from .models import DataVersion
+
+class ResponseCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, version, key):
+        with self._lock:
+            if version != self.version:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, version, key, entry):
+        with self._lock:
+            # Entries from an older data version can never be served again
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+
+response_cache = ResponseCache()
+
+def make_etag(version, key):
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return f"v{version}-{digest}"
+
+def versioned(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        version = DataVersion.current()
+        key = request.full_path
+        etag = make_etag(version, key)
+
+        # Weak comparison: compressed responses carry the ETag as W/"..."
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        entry = response_cache.get(version, key)
+        if entry is None:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if response.is_streamed:
+                # Too large to hold in memory; still revalidates by ETag
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+            if DataVersion.current() != version:
+                # A write landed while the body was built; it may hold data
+                # from either version, so it is neither cached nor tagged
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+            entry = (response.get_data(), response.mimetype, dict(response.headers))
+            response_cache.set(version, key, entry)
+
+        body, mimetype, headers = entry
+        response = current_app.response_class(body, status=200, mimetype=mimetype)
+        for name, value in headers.items():
+            if name not in ("Content-Type", "Content-Length"):
+                response.headers[name] = value
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    return decorated_function
@@ -0,0 +1,170 @@
+import zlib
+from collections import OrderedDict
+from threading import Lock
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional, br is not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, zstd is not offered without it
+    zstandard = None
+
+class GzipStream:
+    def __init__(self, level):
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+class BrotliStream:
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+class ZstdStream:
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+def stream_encoded(chunks, encoder):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.flush()
+
+class EncodedCache:
+    # Compressed bodies keyed by (strong ETag, encoding); a strong ETag names
+    # exactly one byte sequence, so entries never need invalidating
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+class Compression:
+    def __init__(self):
+        self.encodings = []
+        self.min_size = 1024
+        self.mimetypes = set()
+        self.levels = {}
+        self.cache = EncodedCache(0)
+
+    def init_app(self, app):
+        if not app.config["COMPRESSION_ENABLED"]:
+            return
+        available = {"br": brotli is not None, "zstd": zstandard is not None, "gzip": True}
+        # Server preference order, used to break ties between equal q-values
+        self.encodings = [name for name in app.config["COMPRESSION_ENCODINGS"] if available.get(name)]
+        self.min_size = app.config["COMPRESSION_MIN_SIZE"]
+        self.mimetypes = set(app.config["COMPRESSION_MIMETYPES"])
+        self.levels = {
+            "gzip": app.config["COMPRESSION_GZIP_LEVEL"],
+            "br": app.config["COMPRESSION_BROTLI_QUALITY"],
+            "zstd": app.config["COMPRESSION_ZSTD_LEVEL"],
+        }
+        self.cache = EncodedCache(app.config["COMPRESSION_CACHE_MB"] * 1024 * 1024)
+        app.after_request(self._after_request)
+
+    def encoder(self, encoding):
+        level = self.levels[encoding]
+        if encoding == "br":
+            return BrotliStream(level)
+        if encoding == "zstd":
+            return ZstdStream(level)
+        return GzipStream(level)
+
+    def negotiate(self):
+        best, best_quality = None, 0
+        for name in self.encodings:
+            quality = request.accept_encodings.quality(name)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def _after_request(self, response):
+        # Every compressible response varies on Accept-Encoding, compressed or not
+        if response.mimetype not in self.mimetypes:
+            return response
+        response.vary.add("Accept-Encoding")
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or request.method == "HEAD"
+            or "Content-Encoding" in response.headers
+            or response.cache_control.no_transform
+            or response.direct_passthrough
+        ):
+            return response
+
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # Compressed chunk by chunk as the body is produced; never buffered
+            response.response = stream_encoded(response.response, self.encoder(encoding))
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            etag, weak = response.get_etag()
+            key = (etag, encoding) if etag and not weak else None
+            compressed = self.cache.get(key) if key else None
+            if compressed is None:
+                encoder = self.encoder(encoding)
+                compressed = encoder.compress(body) + encoder.flush()
+                if key:
+                    self.cache.set(key, compressed)
+            response.set_data(compressed)
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # Different bytes than the identity body: only a weak validator
+            # still holds, and conditional requests compare weakly anyway
+            response.set_etag(etag, weak=True)
+        return response
+
+compression = Compression()
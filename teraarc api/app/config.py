@@ -1,17 +1,12 @@
 import os
-from datetime import timedelta
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Importing this module has no side effects: .env is loaded by the entry
+# point (run.py, or the flask CLI itself) and create_app makes the folders
 
 # Get the absolute path to the instance folder
 BASE_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
 INSTANCE_PATH = os.path.join(BASE_DIR, 'instance')
 
-# Ensure instance directory exists
-os.makedirs(INSTANCE_PATH, exist_ok=True)
-
 class Config:
     # Flask Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
@@ -19,8 +14,120 @@ class Config:
     
     # Database Configuration
     DB_PATH = os.path.join(INSTANCE_PATH, "projects.db")
-    SQLALCHEMY_DATABASE_URI = f'sqlite:///{DB_PATH}'
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', f'sqlite:///{DB_PATH}')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Read Replica: GET requests read from this bind, writes go to the primary.
+    # A local SQLite file is refreshed from the primary with the backup API
+    READ_REPLICA_URL = os.getenv('READ_REPLICA_URL')
+    SQLALCHEMY_BINDS = {'replica': READ_REPLICA_URL} if READ_REPLICA_URL else {}
+    READ_REPLICA_REFRESH_SECONDS = float(os.getenv('READ_REPLICA_REFRESH_SECONDS', 2))  # 0: refreshed externally
+    READ_STICKY_SECONDS = int(os.getenv('READ_STICKY_SECONDS', 60))  # how long a writer's version cookie lasts
+    # Off: startup only checks the schema is at the latest migration
+    DB_CREATE_ON_STARTUP = os.getenv('DB_CREATE_ON_STARTUP', '1') == '1'
+    MIGRATIONS_DIR = os.path.join(BASE_DIR, 'migrations')
+    
+    # SQLite Tuning, applied to every new connection
+    SQLITE_TUNING = os.getenv('SQLITE_TUNING', '1') == '1'
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # readers no longer block behind a writer
+        'synchronous': 'NORMAL',  # safe with WAL, fsync only at checkpoints
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),  # negative means KiB
+        'temp_store': 'MEMORY',
+    }
+    WRITE_RETRY_ATTEMPTS = int(os.getenv('WRITE_RETRY_ATTEMPTS', 5))
+    WRITE_RETRY_BACKOFF_MS = int(os.getenv('WRITE_RETRY_BACKOFF_MS', 25))
+    
+    # Front-End Configuration, served by the pages blueprint
+    FRONTEND_DIR = os.getenv('FRONTEND_DIR', os.path.join(os.path.dirname(BASE_DIR), 'Front-End'))
+    ASSETS_DIR = os.getenv('ASSETS_DIR', os.path.join(INSTANCE_PATH, 'assets'))  # output of flask build-assets
+    
+    # Image Configuration: originals and the resized variant cache live under IMAGE_DIR
+    IMAGE_DIR = os.getenv('IMAGE_DIR', os.path.join(INSTANCE_PATH, 'images'))
+    IMAGE_MAX_UPLOAD_MB = int(os.getenv('IMAGE_MAX_UPLOAD_MB', 10))
+    IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 40_000_000))
+    IMAGE_CACHE_MAX_MB = int(os.getenv('IMAGE_CACHE_MAX_MB', 512))
+    IMAGE_ORIGINALS_MAX_MB = int(os.getenv('IMAGE_ORIGINALS_MAX_MB', 2048))  # uploads are refused beyond this
+    IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 80))
+    
+    # Pagination Configuration
+    PROJECTS_MAX_PAGE_SIZE = int(os.getenv('PROJECTS_MAX_PAGE_SIZE', 100))
+    # Unpaginated lists longer than this are streamed instead of built in memory
+    PROJECTS_STREAM_CHUNK = int(os.getenv('PROJECTS_STREAM_CHUNK', 1000))
+    
+    # JSON Configuration: 'auto' uses orjson when it is installed
+    JSON_ENCODER = os.getenv('JSON_ENCODER', 'auto')
+    
+    # Compression Configuration: br and zstd are offered when brotli/zstandard are installed
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', '1') == '1'
+    COMPRESSION_ENCODINGS = os.getenv('COMPRESSION_ENCODINGS', 'br,zstd,gzip').split(',')
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # bytes
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3))
+    COMPRESSION_CACHE_MB = int(os.getenv('COMPRESSION_CACHE_MB', 32))
+    COMPRESSION_MIMETYPES = [
+        'application/json', 'application/x-ndjson', 'text/html', 'text/css',
+        'text/javascript', 'application/javascript', 'text/plain', 'image/svg+xml',
+    ]
+    
+    # Response Cache Configuration
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 256))
+    
+    # Change Feed Configuration
+    CHANGES_MAX_BATCH = int(os.getenv('CHANGES_MAX_BATCH', 500))
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', 30))
+    
+    # Event Stream Configuration
+    SSE_POLL_INTERVAL = float(os.getenv('SSE_POLL_INTERVAL', 0.5))
+    SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+    SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', 3000))
+    SSE_CLIENT_BUFFER = int(os.getenv('SSE_CLIENT_BUFFER', 256))  # events queued per client before eviction
+    # Open streams per worker, admins and visitors apart; gunicorn.conf.py adds a thread for each
+    SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', 4))
+    SSE_PUBLIC_MAX_CLIENTS = int(os.getenv('SSE_PUBLIC_MAX_CLIENTS', 16))  # past this, the page polls /projects/changes
+    SSE_REPLAY_LIMIT = int(os.getenv('SSE_REPLAY_LIMIT', 1000))
+    SSE_EVENT_RETENTION_HOURS = int(os.getenv('SSE_EVENT_RETENTION_HOURS', 24))
+    
+    # Bulk Export/Import Configuration
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+    IMPORT_MAX_BATCH_SIZE = int(os.getenv('IMPORT_MAX_BATCH_SIZE', 10000))
+    
+    # Rate Limit Configuration: token buckets per client IP and endpoint,
+    # shared by all workers through RATE_LIMIT_DB; limits are 'count/period'
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', os.path.join(INSTANCE_PATH, 'ratelimit.db'))
+    RATE_LIMIT_TIMEOUT_MS = int(os.getenv('RATE_LIMIT_TIMEOUT_MS', 100))  # checks give up (and allow) after this
+    RATE_LIMIT_DEFAULT = os.getenv('RATE_LIMIT_DEFAULT', '300/minute')
+    RATE_LIMITS = {
+        'api.login': os.getenv('RATE_LIMIT_LOGIN', '10/minute'),
+        'api.get_projects': os.getenv('RATE_LIMIT_PROJECTS', '120/minute'),
+        'api.search': os.getenv('RATE_LIMIT_SEARCH', '120/minute'),
+        'api.import_projects': os.getenv('RATE_LIMIT_IMPORT', '10/minute'),
+        'api.upload_image': os.getenv('RATE_LIMIT_UPLOAD', '30/minute'),
+    }
+    RATE_LIMIT_EXEMPT = ['api.get_metrics']  # also exempt from load shedding
+    # Proxies in front of the app trusted to set X-Forwarded-For/-Proto (nginx: 1);
+    # without it every client behind the proxy shares the proxy's rate limit
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))
+    
+    # Load Shedding Configuration: 0 disables a check
+    LOAD_SHED_QUEUE_MS = float(os.getenv('LOAD_SHED_QUEUE_MS', 2000))  # needs X-Request-Start from the proxy
+    LOAD_SHED_MAX_INFLIGHT = int(os.getenv('LOAD_SHED_MAX_INFLIGHT', 0))  # concurrent requests per worker
+    LOAD_SHED_RETRY_AFTER = int(os.getenv('LOAD_SHED_RETRY_AFTER', 5))  # seconds
+    
+    # Logging Configuration: JSON lines on stdout, written by a background thread
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))  # records beyond this are dropped and counted
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.1))  # share of noisy records (access, auth failures) kept
+    
+    # Metrics Configuration
+    METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(INSTANCE_PATH, 'metrics'))
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+    SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 500))
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
     
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
@@ -28,6 +135,7 @@ class Config:
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
+    JWT_CLAIMS_CACHE_SIZE = int(os.getenv('JWT_CLAIMS_CACHE_SIZE', 1024))  # verified tokens per worker, 0 disables
     
     # Admin Configuration
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
@@ -37,10 +145,15 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+    # Schema changes are applied with `flask db upgrade` before deploying
+    DB_CREATE_ON_STARTUP = os.getenv('DB_CREATE_ON_STARTUP', '0') == '1'
 
 class TestingConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # Benchmarks point this at a file so several processes can share it
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///:memory:')
+    # Benchmarks and smoke tests hammer single endpoints from one address
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '0') == '1'
 
 config = {
     'development': DevelopmentConfig,
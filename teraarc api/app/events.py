@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import timedelta
+from .models import db, DataVersion, ProjectEvent
+from .metrics import metrics
+from .sqlite import is_database_locked, write_transaction
+
+logger = logging.getLogger(__name__)
+
+# How often the poller trims the event log, in seconds
+COMPACT_INTERVAL = 600
+
+def format_event(row):
+    data = {"version": row.version, "type": row.type}
+    if row.project_id is not None:
+        data["id"] = str(row.project_id)
+    if row.payload is not None:
+        data["data"] = json.loads(row.payload)
+    return f"id: {row.version}\nevent: {row.type}\ndata: {json.dumps(data)}\n\n"
+
+class Subscriber:
+    def __init__(self, buffer_size, public):
+        self.queue = queue.Queue(maxsize=buffer_size)
+        self.public = public
+        self.evicted = False
+
+class EventBroker:
+    # Every worker tails the project_events table and fans new rows out to
+    # its own connections, so a write on one worker reaches clients on all
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.app = None
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.subscribers = set()
+        self.last_version = None
+        self._poller = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def subscribe(self, public=False):
+        # None when the worker already holds its limit of streams: each one
+        # keeps a thread busy for as long as it is open. Visitors and admins
+        # have separate limits, so visitors can never use up the admins' share
+        self._ensure_poller()
+        subscriber = Subscriber(self.app.config["SSE_CLIENT_BUFFER"], public)
+        limit = self.app.config["SSE_PUBLIC_MAX_CLIENTS" if public else "SSE_MAX_CLIENTS"]
+        with self.lock:
+            full = sum(1 for s in self.subscribers if s.public == public) >= limit
+            if not full:
+                self.subscribers.add(subscriber)
+        if full:
+            metrics.inc("sse_rejections_total", (("client", "public" if public else "admin"),))
+            return None
+        metrics.inc("sse_connections_total", ())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, message):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                # A slow reader must not hold the others back; it reconnects
+                # with Last-Event-ID and replays from the log instead
+                subscriber.evicted = True
+                self.unsubscribe(subscriber)
+                metrics.inc("sse_evictions_total", ())
+
+    def _ensure_poller(self):
+        # Same fork handling as the metrics flusher: one poller per worker
+        if self._poller is not None and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self._reset()
+            if self._poller is None:
+                # Taken before any client's replay query so nothing falls between the two
+                self.last_version = DataVersion.current()
+                self._poller = threading.Thread(target=self._poll_loop, name="event-poller", daemon=True)
+                self._poller.start()
+
+    def _poll_loop(self):
+        interval = self.app.config["SSE_POLL_INTERVAL"]
+        retention = timedelta(hours=self.app.config["SSE_EVENT_RETENTION_HOURS"])
+        compacted_at = 0
+        while True:
+            try:
+                with self.app.app_context():
+                    self.poll()
+            except Exception:
+                logger.exception("Event stream poll failed")
+            if time.monotonic() - compacted_at >= COMPACT_INTERVAL:
+                try:
+                    self.compact(retention)
+                    compacted_at = time.monotonic()
+                except Exception as e:
+                    if is_database_locked(e):
+                        # Busy with writers; tried again on the next tick
+                        logger.debug("Event log compaction skipped, database is locked")
+                    else:
+                        logger.exception("Event log compaction failed")
+            time.sleep(interval)
+
+    def compact(self, retention):
+        # Its own short transaction, holding the write lock from the start:
+        # upgrading the poller's read transaction fails whenever it races a writer
+        with self.app.app_context(), write_transaction():
+            ProjectEvent.compact(retention)
+            db.session.commit()
+
+    def poll(self):
+        rows = db.session.execute(
+            db.select(ProjectEvent)
+            .where(ProjectEvent.version > self.last_version)
+            .order_by(ProjectEvent.version)
+        ).scalars().all()
+        for row in rows:
+            # Formatted once here rather than once per client
+            self.publish((row.version, format_event(row)))
+            self.last_version = row.version
+
+    def replay(self, since):
+        # Returns (since, events, reset); reset tells the client the log no
+        # longer covers its position and it has to resync through /projects/changes
+        current = DataVersion.current()
+        if since is None or since >= current:
+            return current, [], False
+        oldest = db.session.execute(db.select(db.func.min(ProjectEvent.version))).scalar()
+        if oldest is None or oldest > since + 1:
+            return since, [], True
+        limit = self.app.config["SSE_REPLAY_LIMIT"]
+        rows = db.session.execute(
+            db.select(ProjectEvent)
+            .where(ProjectEvent.version > since)
+            .order_by(ProjectEvent.version)
+            .limit(limit + 1)
+        ).scalars().all()
+        if len(rows) > limit:
+            return since, [], True
+        return since, [(row.version, format_event(row)) for row in rows], False
+
+    def stream(self, subscriber, backlog, reset, since):
+        heartbeat = self.app.config["SSE_HEARTBEAT_SECONDS"]
+        try:
+            # The bare id sets the client's Last-Event-ID without firing an event
+            yield f"retry: {self.app.config['SSE_RETRY_MS']}\nid: {since}\n\n"
+            if reset:
+                yield f"event: reset\ndata: {json.dumps({'since': since})}\n\n"
+            last_version = since
+            for version, message in backlog:
+                last_version = version
+                yield message
+            while not subscriber.evicted:
+                try:
+                    version, message = subscriber.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                # Subscribed before the replay query, so skip what it already sent
+                if version <= last_version:
+                    continue
+                last_version = version
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+broker = EventBroker()
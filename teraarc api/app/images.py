@@ -0,0 +1,194 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import time
+from threading import Lock
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional, originals are served unresized without it
+    Image = None
+
+# Widths offered in srcset; a request for any other width gets the next one up
+VARIANT_WIDTHS = (320, 640, 960, 1280, 1920)
+# What a card asks for when the browser ignores srcset
+CARD_WIDTH = 640
+CARD_SIZES = "(max-width: 768px) 100vw, 400px"
+
+# Output format -> (Pillow format, mimetype)
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+# Upload formats, by leading bytes -> (extension, mimetype)
+SIGNATURES = (
+    (b"\xff\xd8\xff", ("jpg", "image/jpeg")),
+    (b"\x89PNG\r\n\x1a\n", ("png", "image/png")),
+    (b"GIF87a", ("gif", "image/gif")),
+    (b"GIF89a", ("gif", "image/gif")),
+)
+EXTENSIONS = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+
+IMAGE_ID = re.compile(r"^[0-9a-f]{32}$")
+LOCAL_URL = re.compile(r"^/api/images/[0-9a-f]{32}$")
+
+# Image URLs are content addressed, so responses can be cached for a year
+IMAGE_MAX_AGE = 365 * 24 * 3600
+# Variants read within this many seconds are not touched again for the LRU
+TOUCH_INTERVAL = 60
+
+class StoreFull(Exception):
+    pass
+
+def sniff(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    for signature, kind in SIGNATURES:
+        if data.startswith(signature):
+            return kind
+    return None
+
+def image_srcset(url):
+    # Only images stored by this API have variants; external URLs pass through
+    if not url or not LOCAL_URL.match(url):
+        return None
+    return ", ".join(f"{url}?w={width} {width}w" for width in VARIANT_WIDTHS)
+
+def pick_width(requested):
+    for width in VARIANT_WIDTHS:
+        if width >= requested:
+            return width
+    return VARIANT_WIDTHS[-1]
+
+class ImageStore:
+    # Originals are content addressed and kept forever, up to a total size;
+    # resized variants are a disk cache trimmed least recently used first
+    def __init__(self):
+        self.directory = None
+        self.max_cache_bytes = 0
+        self.max_originals_bytes = 0
+        self.quality = 80
+        self.max_pixels = None
+        self._lock = Lock()
+
+    @property
+    def can_resize(self):
+        return Image is not None
+
+    def init_app(self, app):
+        self.directory = app.config["IMAGE_DIR"]
+        self.max_cache_bytes = app.config["IMAGE_CACHE_MAX_MB"] * 1024 * 1024
+        self.max_originals_bytes = app.config["IMAGE_ORIGINALS_MAX_MB"] * 1024 * 1024
+        self.quality = app.config["IMAGE_QUALITY"]
+        self.max_pixels = app.config["IMAGE_MAX_PIXELS"]
+        os.makedirs(os.path.join(self.directory, "originals"), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, "variants"), exist_ok=True)
+
+    def save(self, data):
+        kind = sniff(data)
+        if kind is None:
+            raise ValueError("Unsupported image type, use JPEG, PNG, GIF or WebP")
+        if Image is not None:
+            try:
+                with Image.open(io.BytesIO(data)) as image:
+                    if image.width * image.height > self.max_pixels:
+                        raise ValueError("Image dimensions are too large")
+                    image.verify()
+            except (ValueError, Image.DecompressionBombError) as e:
+                raise ValueError(str(e) if isinstance(e, ValueError) else "Image dimensions are too large")
+            except Exception:
+                raise ValueError("Image data is corrupt")
+
+        image_id = hashlib.sha256(data).hexdigest()[:32]
+        path = os.path.join(self.directory, "originals", f"{image_id}.{kind[0]}")
+        if not os.path.exists(path):
+            # Uploads are rare, so the directory is summed each time; workers
+            # racing each other can overshoot by one upload
+            if directory_size(os.path.dirname(path)) + len(data) > self.max_originals_bytes:
+                raise StoreFull("Image storage is full")
+            write_atomic(path, data)
+        return image_id
+
+    def original(self, image_id):
+        if not IMAGE_ID.match(image_id):
+            return None
+        for extension, mimetype in EXTENSIONS.items():
+            path = os.path.join(self.directory, "originals", f"{image_id}.{extension}")
+            if os.path.exists(path):
+                return path, mimetype
+        return None
+
+    def variant(self, image_id, original_path, width, output):
+        # The name holds everything that affects the bytes, so it is also a
+        # strong ETag. Bytes are returned rather than a path: variants are
+        # small, and another worker may evict the file before it is sent
+        name = f"{image_id}-{width}-q{self.quality}.{output}"
+        path = os.path.join(self.directory, "variants", name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+                modified = os.fstat(f.fileno()).st_mtime
+            if time.time() - modified > TOUCH_INTERVAL:
+                os.utime(path)
+            return data, name
+        except OSError:
+            pass
+
+        pil_format, _ = FORMATS[output]
+        with Image.open(original_path) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                image.thumbnail((width, image.height), Image.LANCZOS)
+            if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+                # JPEG has no alpha channel: flatten onto white
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            buffer = io.BytesIO()
+            image.save(buffer, format=pil_format, quality=self.quality, optimize=pil_format == "JPEG")
+        data = buffer.getvalue()
+        write_atomic(path, data)
+        self.evict()
+        return data, name
+
+    def evict(self):
+        # Only one thread per process walks the directory; other workers may
+        # evict concurrently, which at worst removes a file twice
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            directory = os.path.join(self.directory, "variants")
+            entries = []
+            total = 0
+            for entry in os.scandir(directory):
+                if entry.name.startswith("."):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_cache_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+        finally:
+            self._lock.release()
+
+def directory_size(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if not entry.name.startswith("."))
+
+def write_atomic(path, data):
+    # Readers in other workers see the whole file or none of it
+    fd, tmp_path = tempfile.mkstemp(prefix=".", dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+image_store = ImageStore()
@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+import traceback
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+from .metrics import metrics
+
+# Attributes every LogRecord has; anything else was passed through extra=
+# and is written as a field of its own
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+# Incoming X-Request-ID values are kept only if they look like an id
+REQUEST_ID = re.compile(r"^[\w.-]{1,64}$")
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class RequestFilter(logging.Filter):
+    # Runs in the thread that logs, while the request is still known
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        # Noisy records (extra={"sample": True}) are kept at sample_rate;
+        # warnings and errors always get through
+        if vars(record).pop("sample", False):
+            if record.levelno < logging.WARNING and random.random() >= self.sample_rate:
+                return False
+            record.sample_rate = self.sample_rate
+        if has_request_context() and "_log_start" in g:
+            record.request_id = g.request_id
+            record.request_ms = round((time.perf_counter() - g._log_start) * 1000, 2)
+        return True
+
+class AsyncHandler(QueueHandler):
+    # Request threads only put records on a bounded queue; a listener thread
+    # per process formats and writes them. When the queue is full records
+    # are dropped and counted rather than making the request wait
+    def __init__(self, targets, max_queue):
+        super().__init__(None)
+        self.targets = targets
+        self.max_queue = max_queue
+        self.listener = None
+        self.pid = None
+
+    def _ensure_listener(self):
+        # Called under the handler lock. Threads and the queue's locks do
+        # not survive fork, so each worker starts its own
+        if self.pid == os.getpid():
+            return
+        self.queue = queue.Queue(self.max_queue)
+        self.listener = QueueListener(self.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+        self.pid = os.getpid()
+
+    def prepare(self, record):
+        # Only what cannot wait: the message and traceback are bound to this
+        # moment; JSON encoding happens on the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total", ())
+
+    def close(self):
+        # Drains what is queued before the process exits
+        if self.listener is not None and self.pid == os.getpid():
+            try:
+                self.listener.stop()
+            except queue.Full:
+                # No room for the stop sentinel; the daemon thread dies with us
+                pass
+            self.listener = None
+            self.pid = None
+        super().close()
+
+def init_logging(app):
+    logger = logging.getLogger(app.import_name)
+    for handler in list(logger.handlers):
+        if isinstance(handler, AsyncHandler):
+            # create_app called again in the same process
+            logger.removeHandler(handler)
+            handler.close()
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    handler = AsyncHandler([stream], app.config["LOG_QUEUE_SIZE"])
+    handler.addFilter(RequestFilter(app.config["LOG_SAMPLE_RATE"]))
+    logger.addHandler(handler)
+    logger.setLevel(app.config["LOG_LEVEL"])
+    logger.propagate = False
+    # Handlers are closed, and the queue drained, by logging's atexit hook
+
+    access = logging.getLogger(f"{app.import_name}.access")
+
+    @app.before_request
+    def start_request():
+        incoming = request.headers.get("X-Request-ID", "")
+        g.request_id = incoming if REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        g._log_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        if "_log_start" not in g:
+            return response
+        response.headers["X-Request-ID"] = g.request_id
+        failed = response.status_code >= 500
+        access.log(
+            logging.WARNING if failed else logging.INFO,
+            "%s %s %s", request.method, request.path, response.status_code,
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "bytes": response.content_length,  # None for streamed bodies, never buffered here
+                "duration_ms": round((time.perf_counter() - g._log_start) * 1000, 2),
+                "remote_addr": request.remote_addr,
+                "sample": not failed,
+            },
+        )
+        return response
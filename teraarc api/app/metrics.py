@@ -0,0 +1,241 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; +Inf is implied
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HELP = {
+    "http_requests_total": ("counter", "HTTP requests by endpoint, method and status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by endpoint."),
+    "http_slow_requests_total": ("counter", "Requests slower than SLOW_REQUEST_MS."),
+    "sql_statements_total": ("counter", "SQL statements executed by endpoint."),
+    "sql_statement_duration_seconds": ("histogram", "SQL statement latency by endpoint."),
+    "sql_slow_statements_total": ("counter", "SQL statements slower than SLOW_QUERY_MS."),
+    "sse_connections_total": ("counter", "Event stream connections opened."),
+    "sse_evictions_total": ("counter", "Event stream clients dropped for falling behind."),
+    "sse_rejections_total": ("counter", "Event stream connections refused with 503 at SSE_MAX_CLIENTS or SSE_PUBLIC_MAX_CLIENTS."),
+    "rate_limited_total": ("counter", "Requests rejected with 429 by the per-client rate limit."),
+    "requests_shed_total": ("counter", "Requests rejected with 503 while overloaded, by reason."),
+    "log_records_dropped_total": ("counter", "Log records dropped because the logging queue was full."),
+    "replica_primary_reads_total": ("counter", "GET requests sent to the primary because the replica was behind the client."),
+    "replica_refreshes_total": ("counter", "Copies of the primary into the local SQLite read replica."),
+    "jwt_claims_cache_total": ("counter", "JWT verifications served from the claims cache (hit) or verified (miss)."),
+}
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.directory = None
+        self.flush_interval = 5
+        self.slow_request = 0.5
+        self.slow_query = 0.1
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self._flusher = None
+
+    def init_app(self, app, engines):
+        self.directory = app.config["METRICS_DIR"]
+        self.flush_interval = app.config["METRICS_FLUSH_INTERVAL"]
+        self.slow_request = app.config["SLOW_REQUEST_MS"] / 1000
+        self.slow_query = app.config["SLOW_QUERY_MS"] / 1000
+        os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            index = next((i for i, bound in enumerate(BUCKETS) if value <= bound), len(BUCKETS))
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def _before_request(self):
+        self._ensure_flusher()
+        g._metrics_start = time.perf_counter()
+        g._sql_count = 0
+        g._sql_time = 0.0
+
+    def _after_request(self, response):
+        start = g.get("_metrics_start")
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or "unmatched"
+        self.inc("http_requests_total", (("endpoint", endpoint), ("method", request.method), ("status", str(response.status_code))))
+        self.observe("http_request_duration_seconds", (("endpoint", endpoint),), elapsed)
+        if elapsed >= self.slow_request:
+            self.inc("http_slow_requests_total", (("endpoint", endpoint),))
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d SQL statements in %.1f ms",
+                request.method, request.full_path, elapsed * 1000, g._sql_count, g._sql_time * 1000
+            )
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_metrics_start"].pop()
+        endpoint = "none"
+        if has_request_context():
+            endpoint = request.endpoint or "unmatched"
+            if "_sql_count" in g:
+                g._sql_count += 1
+                g._sql_time += elapsed
+        labels = (("endpoint", endpoint),)
+        self.inc("sql_statements_total", labels)
+        self.observe("sql_statement_duration_seconds", labels, elapsed)
+        if elapsed >= self.slow_query:
+            self.inc("sql_slow_statements_total", labels)
+            logger.warning("Slow SQL statement (%.1f ms) on %s: %s", elapsed * 1000, endpoint, statement)
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork, and a preloaded master must not hand
+        # its counters down, so every worker starts its own flusher
+        if self._flusher is not None and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self._reset()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Failed to write metrics snapshot")
+
+    def flush(self):
+        with self.lock:
+            snapshot = {
+                "counters": [[name, dict(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, dict(labels), h[0], h[1], h[2]] for (name, labels), h in self.histograms.items()],
+            }
+        write_snapshot(os.path.join(self.directory, f"worker-{self.pid}.json"), snapshot)
+
+    def close(self):
+        # Last snapshot of a worker that is shutting down (gunicorn worker_exit)
+        if self.directory and self._flusher is not None and self.pid == os.getpid():
+            self.flush()
+
+    def clear(self):
+        # A new master starts every count from zero (gunicorn on_starting)
+        for path in glob.glob(os.path.join(self.directory, "*.json*")):
+            os.remove(path)
+
+    def retire(self, pid):
+        # Folds an exited worker's snapshot into retired.json (gunicorn
+        # child_exit), so counters stay monotonic across worker restarts
+        # without one file per worker that ever ran
+        path = os.path.join(self.directory, f"worker-{pid}.json")
+        exited = read_snapshot(path)
+        if exited is None:
+            return
+        counters, histograms = defaultdict(float), {}
+        retired_path = os.path.join(self.directory, "retired.json")
+        for snapshot in (read_snapshot(retired_path), exited):
+            if snapshot is not None:
+                merge_snapshot(snapshot, counters, histograms)
+        write_snapshot(retired_path, {
+            "counters": [[name, dict(labels), value] for (name, labels), value in counters.items()],
+            "histograms": [[name, dict(labels), h[0], h[1], h[2]] for (name, labels), h in histograms.items()],
+        })
+        os.remove(path)
+
+    def collect(self):
+        # Sum the snapshots of the live workers and of the ones that have exited
+        self.flush()
+        counters = defaultdict(float)
+        histograms = {}
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            snapshot = read_snapshot(path)
+            if snapshot is not None:
+                merge_snapshot(snapshot, counters, histograms)
+        return counters, histograms
+
+    def render(self):
+        counters, histograms = self.collect()
+        series = defaultdict(list)
+        for (name, labels), value in sorted(counters.items()):
+            series[name].append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS + (float("inf"),), buckets):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                series[name].append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+            series[name].append(f"{name}_sum{format_labels(labels)} {format_value(total)}")
+            series[name].append(f"{name}_count{format_labels(labels)} {count}")
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text = HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(series[name])
+        return "\n".join(lines) + "\n"
+
+def read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_snapshot(path, snapshot):
+    # Write then rename so a scrape never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+def merge_snapshot(snapshot, counters, histograms):
+    for name, labels, value in snapshot["counters"]:
+        counters[(name, tuple(sorted(labels.items())))] += value
+    for name, labels, buckets, total, count in snapshot["histograms"]:
+        key = (name, tuple(sorted(labels.items())))
+        merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+        merged[1] += total
+        merged[2] += count
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels) + "}"
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+metrics = Metrics()
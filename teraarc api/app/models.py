@@ -1,11 +1,45 @@
+import ast
+import glob
+import json
+import os
 from datetime import datetime
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
 from sqlalchemy.exc import SQLAlchemyError
+from .images import image_srcset
+from .routing import RoutingSession
 
-db = SQLAlchemy()
+# Reads in GET requests may go to a replica bind, see routing.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        # Keyset pagination indexes, one per sortable column
+        db.Index('ix_projects_created_at_id', 'created_at', 'id'),
+        db.Index('ix_projects_title_id', 'title', 'id'),
+        db.Index('ix_projects_updated_at_id', 'updated_at', 'id'),
+    )
+
+    # API field name -> column attribute, used for ?fields= projection
+    API_FIELDS = {
+        "id": "id",
+        "title": "title",
+        "description": "description",
+        "imageUrl": "image_url",
+        "videoUrl": "video_url",
+        "githubUrl": "github_url",
+        "createdAt": "created_at",
+        "updatedAt": "updated_at",
+    }
+
+    # ?sort= value -> column attribute
+    SORT_KEYS = {
+        "created_at": "created_at",
+        "title": "title",
+        "updated_at": "updated_at",
+    }
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
@@ -23,17 +57,21 @@ class Project(db.Model):
         self.video_url = video_url
         self.github_url = github_url
 
-    def to_dict(self):
-        return {
-            "id": str(self.id),
-            "title": self.title,
-            "description": self.description,
-            "imageUrl": self.image_url,
-            "videoUrl": self.video_url,
-            "githubUrl": self.github_url,
-            "createdAt": self.created_at.isoformat(),
-            "updatedAt": self.updated_at.isoformat()
-        }
+    def to_dict(self, fields=None):
+        data = {}
+        for field, attr in self.API_FIELDS.items():
+            # Skip unrequested fields so deferred columns stay unloaded
+            if fields is not None and field not in fields:
+                continue
+            value = getattr(self, attr)
+            if attr == "id":
+                value = str(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            data[field] = value
+        if "imageUrl" in data:
+            data["imageSrcset"] = image_srcset(data["imageUrl"])
+        return data
 
     @staticmethod
     def validate(data):
@@ -44,4 +82,224 @@ class Project(db.Model):
             errors.append("Description is required")
         if not data.get('image_url'):
             errors.append("Image URL is required")
-        return errors 
\ No newline at end of file
+        return errors
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+
+    # Single row bumped by every write so all workers can validate their caches
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # Highest version whose tombstones may have been compacted away
+    compacted_version = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def current():
+        return db.session.execute(
+            db.select(DataVersion.version).where(DataVersion.id == 1)
+        ).scalar() or 0
+
+    @staticmethod
+    def bump():
+        # Runs inside the caller's transaction, so the bump commits with the write
+        db.session.execute(
+            db.update(DataVersion).where(DataVersion.id == 1).values(version=DataVersion.version + 1)
+        )
+        version = DataVersion.current()
+        if has_request_context():
+            # Handed to the client so its next reads see at least this version
+            g.written_version = version
+        return version
+
+class ProjectChange(db.Model):
+    __tablename__ = 'project_changes'
+    __table_args__ = (
+        db.Index('ix_project_changes_version_project_id', 'version', 'project_id'),
+        db.Index('ix_project_changes_deleted_changed_at', 'deleted', 'changed_at'),
+    )
+
+    # One row per project holding the data version of its latest write;
+    # rows with deleted=True are the tombstones of removed projects
+    project_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @staticmethod
+    def compact(retention):
+        cutoff = datetime.utcnow() - retention
+        expired = (ProjectChange.deleted.is_(True), ProjectChange.changed_at < cutoff)
+        horizon = db.session.execute(
+            db.select(db.func.max(ProjectChange.version)).where(*expired)
+        ).scalar()
+        if horizon is None:
+            return 0
+        result = db.session.execute(db.delete(ProjectChange).where(*expired))
+        db.session.execute(
+            db.update(DataVersion)
+            .where(DataVersion.id == 1, DataVersion.compacted_version < horizon)
+            .values(compacted_version=horizon)
+        )
+        return result.rowcount
+
+class ProjectEvent(db.Model):
+    __tablename__ = 'project_events'
+
+    # Append-only log polled by every worker to fan out /projects/stream.
+    # Keyed by data version, so an event id doubles as a /projects/changes token
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    type = db.Column(db.String(16), nullable=False)
+    project_id = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    @staticmethod
+    def compact(retention):
+        cutoff = datetime.utcnow() - retention
+        result = db.session.execute(db.delete(ProjectEvent).where(ProjectEvent.created_at < cutoff))
+        return result.rowcount
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+
+    # Logged out tokens, kept only until they would have expired anyway
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    @staticmethod
+    def is_revoked(jti):
+        # Always the primary: a replica a few seconds behind would accept
+        # a token right after logout
+        return db.session.execute(
+            db.select(RevokedToken.jti).where(RevokedToken.jti == jti),
+            bind_arguments={"bind": db.engine}
+        ).first() is not None
+
+    @staticmethod
+    def revoke(jti, expires_at):
+        db.session.merge(RevokedToken(jti=jti, expires_at=expires_at))
+        # Expired tokens fail verification on their own, so their rows can go
+        db.session.execute(db.delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+
+def record_change(project_id, event, project=None):
+    # Flush first so the event payload carries the values being committed
+    db.session.flush()
+    version = DataVersion.bump()
+    now = datetime.utcnow()
+    db.session.merge(ProjectChange(
+        project_id=project_id,
+        version=version,
+        deleted=event == 'deleted',
+        changed_at=now
+    ))
+    db.session.add(ProjectEvent(
+        version=version,
+        type=event,
+        project_id=project_id,
+        payload=json.dumps(project.to_dict()) if project is not None else None,
+        created_at=now
+    ))
+    return version
+
+# External-content FTS5 index over projects, kept in sync by triggers
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE projects_fts USING fts5(
+        title, description,
+        content='projects', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS projects_fts_au AFTER UPDATE OF title, description ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO projects_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+def init_search_index():
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+        ).scalar()
+        if exists:
+            # Triggers use IF NOT EXISTS, the table itself is already in place
+            for statement in SEARCH_INDEX_DDL[1:]:
+                conn.exec_driver_sql(statement)
+            return
+        for statement in SEARCH_INDEX_DDL:
+            conn.exec_driver_sql(statement)
+        # Index rows that existed before the search table was added
+        conn.exec_driver_sql("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')")
+
+def add_missing_columns():
+    # create_all() does not alter tables that already exist; columns added
+    # to them after the first release are added here
+    with db.engine.begin() as conn:
+        columns = {c["name"] for c in inspect(conn).get_columns("data_version")}
+        if "compacted_version" not in columns:
+            conn.exec_driver_sql(
+                "ALTER TABLE data_version ADD COLUMN compacted_version INTEGER NOT NULL DEFAULT 0"
+            )
+
+def init_db():
+    db.create_all()
+    add_missing_columns()
+    init_search_index()
+    if db.session.get(DataVersion, 1) is None:
+        db.session.add(DataVersion(id=1, version=0))
+        db.session.commit()
+    # create_all() skips indexes on tables that already exist
+    for index in Project.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+def migration_heads(directory):
+    # Reads revision ids straight from the migration scripts; importing
+    # alembic for this would cost more than the rest of create_app
+    revisions, parents = set(), set()
+    for path in glob.glob(os.path.join(directory, "versions", "*.py")):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                name = node.targets[0].id
+                if name == "revision":
+                    revisions.add(ast.literal_eval(node.value))
+                elif name == "down_revision":
+                    down = ast.literal_eval(node.value)
+                    parents.update(down if isinstance(down, (tuple, list)) else [down])
+    return revisions - parents
+
+def verify_schema(directory):
+    # Production startup: compare revisions instead of inspecting and
+    # creating every table in each worker
+    expected = migration_heads(directory)
+    with db.engine.connect() as conn:
+        tables = set(inspect(conn).get_table_names())
+        current = set()
+        if "alembic_version" in tables:
+            current = set(conn.exec_driver_sql("SELECT version_num FROM alembic_version").scalars())
+    if current != expected:
+        # A database from before migrations has tables but no revision;
+        # upgrading it would fail on the tables that already exist
+        fix = "DB_CREATE_ON_STARTUP=1 flask db stamp head" if not current and tables else "flask db upgrade"
+        raise RuntimeError(
+            f"Database schema is at revision {', '.join(sorted(current)) or 'none'}, "
+            f"expected {', '.join(sorted(expected))}. Run '{fix}' before starting."
+        )
+    # A stamped database is not necessarily a complete one
+    required = set(db.metadata.tables)
+    if db.engine.dialect.name == 'sqlite':
+        required.add('projects_fts')
+    missing = required - tables
+    if missing:
+        raise RuntimeError(
+            f"Database is stamped at {', '.join(sorted(current))} but is missing tables "
+            f"{', '.join(sorted(missing))}. Run 'DB_CREATE_ON_STARTUP=1 flask db stamp head' "
+            "to create them."
+        )
@@ -0,0 +1,183 @@
+import mimetypes
+import os
+import re
+from threading import Lock
+import click
+from flask import Blueprint, abort, current_app, render_template_string, request, send_file
+from werkzeug.security import safe_join
+from .models import db, DataVersion
+from .cache import make_etag
+from .serializers import projects_table, project_select, rows_to_dicts
+from .images import CARD_WIDTH, CARD_SIZES
+from . import assets
+
+# cli_group=None puts build-assets at the top level: flask build-assets
+pages = Blueprint("pages", __name__, cli_group=None)
+
+# Fingerprinted names change with their content, so they can be cached forever
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Precompressed variants written by the build, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Same markup as createProjectCard() in Front-End/js/projects.js
+GRID_TEMPLATE = """
+{%- for project in projects %}
+<div class="project-card" data-project="{{ project.id }}">
+    <div class="project-image">
+        {%- if project.imageSrcset %}
+        <img src="{{ project.imageUrl }}?w={{ card_width }}" srcset="{{ project.imageSrcset }}" sizes="{{ card_sizes }}" alt="{{ project.title }}" loading="lazy">
+        {%- else %}
+        <img src="{{ project.imageUrl }}" alt="{{ project.title }}">
+        {%- endif %}
+    </div>
+    <div class="project-content">
+        <h3>{{ project.title }}</h3>
+        <button class="view-details-btn" onclick="openProjectModal({{ project.id }})">
+            <i class="fas fa-eye"></i>
+            View Details
+        </button>
+    </div>
+</div>
+{%- else %}
+<div class="error-message">
+    <i class="fas fa-exclamation-circle"></i>
+    <p>No projects available.</p>
+</div>
+{%- endfor %}
+"""
+
+# projects.html marks the grid contents it ships as a loading placeholder
+GRID_PATTERN = re.compile(
+    r'(<div class="projects-grid")>(\s*<!-- projects:start -->).*?(<!-- projects:end -->)',
+    re.DOTALL
+)
+
+class FragmentCache:
+    # Holds the grid for a single data version; any write makes it stale
+    def __init__(self):
+        self.version = None
+        self.html = None
+        self._lock = Lock()
+
+    def get(self, version, render):
+        with self._lock:
+            if version != self.version:
+                self.html = render()
+                self.version = version
+            return self.html
+
+grid_cache = FragmentCache()
+page_sources = {}
+manifests = {}
+
+def site():
+    # The built tree once `flask build-assets` has run, the raw sources before
+    directory = current_app.config["ASSETS_DIR"]
+    path = os.path.join(directory, assets.MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return current_app.config["FRONTEND_DIR"], {}
+    cached = manifests.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = manifests[path] = (mtime, assets.load_manifest(directory) or {})
+    return directory, cached[1]
+
+def send_asset(directory, filename, immutable=False):
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    encoding = None
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings.quality(name) > 0 and os.path.isfile(path + suffix):
+            encoding, path = name, path + suffix
+            break
+
+    # Without a max age send_file marks the response no-cache, which is what
+    # pages and unhashed names need to pick up a new build on the next visit
+    response = send_file(path, mimetype=mimetype, conditional=True, max_age=IMMUTABLE_MAX_AGE if immutable else None)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+def card_image_url(url):
+    # Mirrors the Unsplash handling in createProjectCard()
+    if url and "unsplash.com" in url:
+        if "https://" not in url:
+            url = f"https://{url}"
+        if "auto=format" not in url:
+            url += ("&" if "?" in url else "?") + "auto=format&fit=crop&w=1200&q=80"
+    return url
+
+def render_grid():
+    keys, query = project_select(["id", "title", "imageUrl"])
+    query = query.order_by(projects_table.c.created_at, projects_table.c.id)
+    projects = rows_to_dicts(keys, db.session.execute(query).all())
+    for project in projects:
+        project["imageUrl"] = card_image_url(project["imageUrl"])
+    return render_template_string(GRID_TEMPLATE, projects=projects, card_width=CARD_WIDTH, card_sizes=CARD_SIZES)
+
+def read_page(name):
+    # Re-read only when the file changes on disk; the mtime goes into the ETag
+    path = os.path.join(site()[0], name)
+    mtime = os.path.getmtime(path)
+    cached = page_sources.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, encoding="utf-8") as f:
+            cached = page_sources[path] = (mtime, f.read())
+    return cached
+
+@pages.route("/projects.html", methods=["GET"])
+def projects_page():
+    version = DataVersion.current()
+    mtime, source = read_page("projects.html")
+    # The page changes with the data and with every asset build, which
+    # renames the scripts and stylesheet it links to
+    etag = make_etag(version, f"{request.path}:{mtime}")
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    grid = grid_cache.get(version, render_grid)
+    # data-version lets projects.js hydrate instead of refetching, and
+    # poll the change feed from exactly this version
+    html, count = GRID_PATTERN.subn(
+        lambda m: f'{m.group(1)} data-version="{version}">{m.group(2)}{grid}\n{m.group(3)}',
+        source,
+        count=1
+    )
+    if not count:
+        current_app.logger.warning("projects.html has no grid markers, serving it unrendered")
+    response = current_app.response_class(html, mimetype="text/html")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@pages.route("/", methods=["GET"])
+def index_page():
+    return send_asset(site()[0], "index.html")
+
+@pages.route("/<path:filename>", methods=["GET"])
+def frontend_file(filename):
+    directory, manifest = site()
+    if filename == assets.MANIFEST:
+        abort(404)
+    if filename in manifest:
+        # A page from an older build asking for the unhashed name
+        return send_asset(directory, manifest[filename])
+    return send_asset(directory, filename, immutable=filename in manifest.values())
+
+@pages.cli.command("build-assets")
+def build_assets():
+    """Minify, fingerprint and precompress the Front-End into ASSETS_DIR."""
+    manifest = assets.build(current_app.config["FRONTEND_DIR"], current_app.config["ASSETS_DIR"])
+    for source, target in sorted(manifest.items()):
+        click.echo(f"{source} -> {target}")
+    if assets.brotli is None:
+        click.echo("brotli is not installed, only gzip variants were written")
@@ -0,0 +1,182 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import g, jsonify, request
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+# One row per (endpoint, client). The refill, the take and the verdict are a
+# single statement, so concurrent workers can never both spend the last token.
+# SET expressions all see the row as it was before the update.
+TAKE_SQL = """
+INSERT INTO buckets (key, tokens, updated, allowed) VALUES (:key, :capacity - 1, :now, 1)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:capacity, tokens + max(:now - updated, 0) * :rate)
+        - (min(:capacity, tokens + max(:now - updated, 0) * :rate) >= 1),
+    updated = :now,
+    allowed = min(:capacity, tokens + max(:now - updated, 0) * :rate) >= 1
+RETURNING allowed, tokens
+"""
+
+# Prune idle buckets every this many checks per worker
+PRUNE_EVERY = 1000
+
+def parse_limit(value):
+    # "10/minute" -> (capacity, tokens per second)
+    count, _, period = value.partition("/")
+    capacity = int(count)
+    seconds = PERIODS.get(period.strip())
+    if capacity < 1 or seconds is None:
+        raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '10/minute'")
+    return capacity, capacity / seconds
+
+def queue_start(value):
+    # X-Request-Start as set by nginx ("t=1700000000.123"), or in
+    # milliseconds/microseconds as other proxies write it
+    try:
+        start = float(value.strip().removeprefix("t="))
+    except ValueError:
+        return None
+    if start > 1e14:
+        return start / 1e6
+    if start > 1e11:
+        return start / 1e3
+    return start
+
+class BucketStore:
+    # Token buckets in a small SQLite file next to the database, shared by
+    # every worker on the host; kept apart so limiter writes never wait
+    # behind application writes
+    def __init__(self, path, timeout_ms):
+        self.path = path
+        self.timeout_ms = timeout_ms
+        self._local = threading.local()
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # Never reuse a connection inherited across fork
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {int(self.timeout_ms)}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Losing a few counters in a crash is harmless
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, allowed INTEGER NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, key, capacity, rate, now):
+        row = self.connection().execute(TAKE_SQL, {"key": key, "capacity": capacity, "rate": rate, "now": now}).fetchone()
+        return bool(row[0]), row[1]
+
+    def prune(self, before):
+        self.connection().execute("DELETE FROM buckets WHERE updated < ?", (before,))
+
+class RateLimiter:
+    def __init__(self):
+        self.store = None
+        self.default = None
+        self.limits = {}
+        self.exempt = set()
+        self.max_queue = 0
+        self.max_inflight = 0
+        self.shed_retry_after = 1
+        self.idle = 3600
+        self._inflight = 0
+        self._checks = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.exempt = set(app.config["RATE_LIMIT_EXEMPT"])
+        self.max_queue = app.config["LOAD_SHED_QUEUE_MS"] / 1000
+        self.max_inflight = app.config["LOAD_SHED_MAX_INFLIGHT"]
+        self.shed_retry_after = app.config["LOAD_SHED_RETRY_AFTER"]
+        if app.config["RATE_LIMIT_ENABLED"]:
+            self.default = parse_limit(app.config["RATE_LIMIT_DEFAULT"])
+            self.limits = {endpoint: parse_limit(value) for endpoint, value in app.config["RATE_LIMITS"].items()}
+            # A bucket untouched for a whole refill period is full again,
+            # so its row carries no information
+            self.idle = max(capacity / rate for capacity, rate in [self.default, *self.limits.values()])
+            self.store = BucketStore(app.config["RATE_LIMIT_DB"], app.config["RATE_LIMIT_TIMEOUT_MS"])
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        endpoint = request.endpoint
+        if request.method == "OPTIONS" or endpoint is None or endpoint in self.exempt:
+            return None
+
+        response = self._shed()
+        if response is not None:
+            return response
+        if self.store is not None and endpoint.startswith("api."):
+            return self._limit(endpoint)
+        return None
+
+    def _shed(self):
+        # Waiting time in the proxy and the listen backlog: once requests sit
+        # there longer than the threshold, answering late is worse than
+        # answering now with a retry hint
+        if self.max_queue:
+            start = queue_start(request.headers.get("X-Request-Start", ""))
+            if start is not None and time.time() - start > self.max_queue:
+                return self._reject("queue", 503, "Server is overloaded, please retry", self.shed_retry_after)
+        if self.max_inflight:
+            with self._lock:
+                if self._inflight >= self.max_inflight:
+                    return self._reject("inflight", 503, "Server is overloaded, please retry", self.shed_retry_after)
+                self._inflight += 1
+            g._inflight = True
+        return None
+
+    def _limit(self, endpoint):
+        capacity, rate = self.limits.get(endpoint, self.default)
+        now = time.time()
+        try:
+            allowed, tokens = self.store.take(f"{endpoint}|{request.remote_addr}", capacity, rate, now)
+            self._checks += 1
+            if self._checks % PRUNE_EVERY == 0:
+                self.store.prune(now - self.idle)
+        except sqlite3.Error:
+            # Fail open: a broken limiter must not take the API down with it
+            logger.exception("Rate limit check failed")
+            return None
+        if allowed:
+            return None
+        metrics.inc("rate_limited_total", (("endpoint", endpoint),))
+        return self._reject(None, 429, "Too many requests, please slow down", (1 - tokens) / rate)
+
+    def _reject(self, reason, status, message, retry_after):
+        if reason is not None:
+            metrics.inc("requests_shed_total", (("reason", reason),))
+        response = jsonify({"error": message})
+        response.status_code = status
+        response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def _release(self):
+        # Counts time spent producing the response; a streamed body keeps
+        # the connection but not a slot
+        if g.pop("_inflight", False):
+            with self._lock:
+                self._inflight -= 1
+
+    def _after_request(self, response):
+        self._release()
+        return response
+
+    def _teardown_request(self, exc):
+        self._release()
+
+limiter = RateLimiter()
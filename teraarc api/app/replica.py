@@ -0,0 +1,157 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+import click
+from flask import g, request
+from .metrics import metrics
+from .models import db, DataVersion
+from .routing import READ_BIND, READ_METHODS, read_from_primary
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, where workers refresh without a lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Cookie and header carrying the version a client has written or seen
+VERSION_COOKIE = "data_version"
+VERSION_HEADER = "X-Data-Version"
+
+def sqlite_path(engine):
+    if engine.dialect.name != "sqlite" or engine.url.database in (None, "", ":memory:"):
+        return None
+    return engine.url.database
+
+def stored_version(conn):
+    try:
+        row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+class ReplicaRouter:
+    # Read-your-writes for the replica bind: a client that wrote (or saw)
+    # version N reads from the primary until the replica has caught up to N
+    def __init__(self):
+        self.enabled = False
+        self.sticky_seconds = 60
+        self.refresh_interval = 0
+        self.primary_path = None
+        self.replica_path = None
+        # Replica versions only grow, so the highest one seen stays valid
+        self.replica_version = 0
+        self.pid = None
+        self._refresher = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.cli.add_command(refresh_replica_command)
+        self.enabled = READ_BIND in app.config["SQLALCHEMY_BINDS"]
+        if not self.enabled:
+            return
+        self.sticky_seconds = app.config["READ_STICKY_SECONDS"]
+        with app.app_context():
+            self.primary_path = sqlite_path(db.engines[None])
+            self.replica_path = sqlite_path(db.engines[READ_BIND])
+        if self.primary_path and self.replica_path:
+            # A local replica file is ours to keep fresh; anything else
+            # (Postgres streaming replication, ...) is refreshed elsewhere
+            self.refresh_interval = app.config["READ_REPLICA_REFRESH_SECONDS"]
+            with closing(sqlite3.connect(self.replica_path, timeout=5)) as conn:
+                empty = stored_version(conn) is None
+            if empty:
+                # Reads must never find an empty file
+                self.refresh(force=True)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        self._ensure_refresher()
+        if request.method not in READ_METHODS:
+            return
+        required = request.headers.get(VERSION_HEADER) or request.cookies.get(VERSION_COOKIE)
+        try:
+            required = int(required or 0)
+        except ValueError:
+            return
+        if required <= self.replica_version:
+            return
+        # Runs on the replica: this is a GET and nothing is pinned yet
+        self.replica_version = max(self.replica_version, DataVersion.current())
+        if required > self.replica_version:
+            metrics.inc("replica_primary_reads_total", ())
+            read_from_primary()
+
+    def _after_request(self, response):
+        # Set by DataVersion.bump, so only requests that changed data pin
+        # their client, and no extra query is needed
+        version = g.get("written_version")
+        if version is not None and 200 <= response.status_code < 300:
+            response.headers[VERSION_HEADER] = str(version)
+            response.set_cookie(VERSION_COOKIE, str(version), max_age=self.sticky_seconds, httponly=True, samesite="Lax")
+        return response
+
+    def _ensure_refresher(self):
+        # One thread per worker, started after fork like the metrics flusher;
+        # a file lock keeps workers from copying at the same time
+        if not self.refresh_interval or (self._refresher is not None and self.pid == os.getpid()):
+            return
+        with self._lock:
+            if self.pid != os.getpid():
+                self._refresher = None
+                self.pid = os.getpid()
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="replica-refresh", daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except (OSError, sqlite3.Error):
+                logger.exception("Replica refresh failed")
+
+    def refresh(self, force=False):
+        # Copies the primary into the replica file with SQLite's online backup
+        # API: one step, so readers see the old copy or the new one, never a mix
+        # The lock file's mtime records the last check: the replica file's own
+        # mtime lags, WAL pages reach it only at checkpoints
+        stamp = f"{self.replica_path}.lock"
+        with open(stamp, "a") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | (0 if force else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    # Another worker is copying right now
+                    return False
+            if not force and time.time() - os.path.getmtime(stamp) < self.refresh_interval:
+                # Another worker checked it this interval
+                return False
+            os.utime(stamp)
+
+            with closing(sqlite3.connect(self.primary_path, timeout=5)) as source, \
+                    closing(sqlite3.connect(self.replica_path, timeout=5)) as target:
+                version = stored_version(source)
+                if not force and version is not None and version == stored_version(target):
+                    # Nothing written since the last copy
+                    return False
+                source.backup(target)
+            metrics.inc("replica_refreshes_total", ())
+            if version is not None:
+                self.replica_version = max(self.replica_version, version)
+            return True
+
+router = ReplicaRouter()
+
+@click.command("refresh-replica")
+def refresh_replica_command():
+    """Copy the primary database into the local SQLite read replica."""
+    if not router.primary_path or not router.replica_path:
+        raise click.ClickException("READ_REPLICA_URL is not a local SQLite file replica of a SQLite primary")
+    router.refresh(force=True)
+    click.echo(f"{router.primary_path} -> {router.replica_path}")
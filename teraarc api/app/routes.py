@@ -1,7 +1,21 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token
-from .models import db, Project
-from .utils import validate_request
+import io
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, stream_with_context, url_for
+from flask_jwt_extended import create_access_token, get_jwt, verify_jwt_in_request
+from sqlalchemy import tuple_
+from werkzeug.exceptions import HTTPException
+from .models import db, Project, ProjectChange, DataVersion, RevokedToken, record_change
+from .cache import versioned
+from .search import search_projects
+from .sync import changes_since
+from .bulk import export_lines, import_lines
+from .events import broker
+from .images import image_store, image_srcset, pick_width, StoreFull, FORMATS, IMAGE_MAX_AGE
+from .metrics import metrics
+from .routing import read_from_primary
+from .serializers import projects_table, project_select, rows_to_dicts
+from .sqlite import retry_on_locked, is_database_locked
+from .utils import validate_request, admin_required, parse_list_args, encode_cursor
 from .config import Config
 
 api = Blueprint('api', __name__)
@@ -14,24 +28,266 @@ def login():
             return jsonify({"error": "Password is required"}), 400
             
         if data["password"] == Config.ADMIN_PASSWORD:
-            # Create access token with admin claim
-            access_token = create_access_token(identity={"is_admin": True})
+            # Create access token with admin claim; PyJWT requires a string subject
+            access_token = create_access_token(identity="admin", additional_claims={"is_admin": True})
             return jsonify({"access_token": access_token}), 200
         else:
             return jsonify({"error": "Invalid password"}), 401
     except Exception as e:
+        current_app.logger.exception("Login failed")
         return jsonify({"error": "Login failed"}), 500
 
+@api.route("/auth/logout", methods=["POST"])
+@admin_required
+@retry_on_locked
+def logout():
+    claims = get_jwt()
+    expires_at = datetime.utcfromtimestamp(claims["exp"]) if "exp" in claims else datetime.max
+    try:
+        RevokedToken.revoke(claims["jti"], expires_at)
+        db.session.commit()
+        return jsonify({"message": "Logged out successfully"}), 200
+    except Exception as e:
+        db.session.rollback()
+        if is_database_locked(e):
+            raise
+        current_app.logger.exception("Logout failed")
+        return jsonify({"error": "Logout failed"}), 500
+
 @api.route("/projects", methods=["GET"])
+@versioned
 def get_projects():
     try:
-        projects = Project.query.all()
-        project_list = [p.to_dict() for p in projects]
-        return jsonify(project_list), 200
+        params = parse_list_args(request.args, current_app.config["PROJECTS_MAX_PAGE_SIZE"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        sort_column = projects_table.c[Project.SORT_KEYS[params["sort_key"]]]
+        id_column = projects_table.c.id
+
+        # Only select the columns the response needs, plus the keyset columns
+        keys, query = project_select(params["fields"], sort_column.label("_sort"), id_column.label("_id"))
+
+        # Keyset pagination on (sort column, id)
+        if params["after"] is not None:
+            if params["descending"]:
+                query = query.where(tuple_(sort_column, id_column) < tuple_(*params["after"]))
+            else:
+                query = query.where(tuple_(sort_column, id_column) > tuple_(*params["after"]))
+
+        if params["descending"]:
+            query = query.order_by(sort_column.desc(), id_column.desc())
+        else:
+            query = query.order_by(sort_column.asc(), id_column.asc())
+
+        next_cursor = None
+        if params["limit"] is not None:
+            rows = db.session.execute(query.limit(params["limit"] + 1)).all()
+            if len(rows) > params["limit"]:
+                rows = rows[:params["limit"]]
+                next_cursor = encode_cursor(params["sort_key"], rows[-1]._sort, rows[-1]._id)
+        else:
+            chunk_size = current_app.config["PROJECTS_STREAM_CHUNK"]
+            partitions = db.session.execute(query.execution_options(yield_per=chunk_size)).partitions()
+            rows = next(partitions, [])
+            if len(rows) == chunk_size:
+                # More rows than one chunk: encode the array piece by piece
+                return Response(stream_with_context(stream_json_array(keys, rows, partitions)), mimetype="application/json")
+
+        project_list = rows_to_dicts(keys, rows)
+        response = jsonify(project_list)
+        if next_cursor:
+            next_args = request.args.to_dict()
+            next_args.update(cursor=next_cursor, limit=params["limit"])
+            response.headers["Link"] = f'<{url_for("api.get_projects", **next_args)}>; rel="next"'
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
     except Exception as e:
+        current_app.logger.exception("Failed to fetch projects")
         return jsonify({"error": "Failed to fetch projects"}), 500
 
+def stream_json_array(keys, first, partitions):
+    dumps = current_app.json.dumps
+    # Each chunk is dumped as a list and its brackets dropped
+    yield "[" + dumps(rows_to_dicts(keys, first))[1:-1]
+    for partition in partitions:
+        yield "," + dumps(rows_to_dicts(keys, partition))[1:-1]
+    yield "]"
+
+@api.route("/projects/search", methods=["GET"])
+@versioned
+def search():
+    text = request.args.get("q", "").strip()
+    if not text:
+        return jsonify({"error": "Query parameter q is required"}), 400
+
+    try:
+        limit = min(int(request.args.get("limit", 20)), current_app.config["PROJECTS_MAX_PAGE_SIZE"])
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({"error": "limit must be positive and offset non-negative"}), 400
+
+    try:
+        # Fetch one extra row to know whether another page exists
+        results = search_projects(text, limit + 1, offset)
+        response = jsonify(results[:limit])
+        if len(results) > limit:
+            next_args = request.args.to_dict()
+            next_args.update(limit=limit, offset=offset + limit)
+            response.headers["Link"] = f'<{url_for("api.search", **next_args)}>; rel="next"'
+        return response, 200
+    except Exception as e:
+        current_app.logger.exception("Failed to search projects")
+        return jsonify({"error": "Failed to search projects"}), 500
+
+@api.route("/projects/changes", methods=["GET"])
+@versioned
+def get_changes():
+    try:
+        feed = changes_since(request.args.get("since"), current_app.config["CHANGES_MAX_BATCH"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.exception("Failed to fetch changes")
+        return jsonify({"error": "Failed to fetch changes"}), 500
+    return jsonify(feed), 200
+
+@api.route("/projects/export", methods=["GET"])
+def export_projects():
+    try:
+        # Read inside the same transaction as the stream, so the token matches the rows
+        token = DataVersion.current()
+        lines = export_lines(current_app.config["EXPORT_CHUNK_SIZE"])
+    except Exception as e:
+        current_app.logger.exception("Failed to export projects")
+        return jsonify({"error": "Failed to export projects"}), 500
+    response = Response(stream_with_context(lines), mimetype="application/x-ndjson")
+    response.headers["X-Change-Token"] = str(token)
+    response.headers["Content-Disposition"] = "attachment; filename=projects.ndjson"
+    return response
+
+@api.route("/projects/stream", methods=["GET"])
+def stream_projects():
+    # Open to visitors: events carry only what GET /projects shows. An admin
+    # token (the admin GUI) draws on a separate, reserved set of streams
+    verify_jwt_in_request(optional=True)
+    public = not get_jwt().get("is_admin", False)
+    # EventSource sends Last-Event-ID on reconnect; the query parameter
+    # covers the first connection of a client that already has a token
+    since = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({"error": "Invalid Last-Event-ID"}), 400
+    # The poller tails the primary; a replay from a lagging replica would
+    # leave a gap between what is replayed and what is pushed
+    read_from_primary()
+
+    subscriber = broker.subscribe(public)
+    if subscriber is None:
+        retry_after = max(1, current_app.config["SSE_RETRY_MS"] // 1000)
+        return jsonify({"error": "Too many open event streams"}), 503, {"Retry-After": str(retry_after)}
+    try:
+        since, backlog, reset = broker.replay(since)
+    except Exception:
+        broker.unsubscribe(subscriber)
+        current_app.logger.exception("Failed to open event stream")
+        return jsonify({"error": "Failed to open event stream"}), 500
+
+    return Response(
+        broker.stream(subscriber, backlog, reset, since),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api.route("/projects/import", methods=["POST"])
+@admin_required
+def import_projects():
+    try:
+        batch_size = int(request.args.get("batch_size", current_app.config["IMPORT_BATCH_SIZE"]))
+    except ValueError:
+        return jsonify({"error": "batch_size must be an integer"}), 400
+    if not 1 <= batch_size <= current_app.config["IMPORT_MAX_BATCH_SIZE"]:
+        return jsonify({"error": f"batch_size must be between 1 and {current_app.config['IMPORT_MAX_BATCH_SIZE']}"}), 400
+    dry_run = request.args.get("dry_run", "0").lower() in ("1", "true", "yes")
+
+    # Lines are read off the socket as they arrive, never buffered whole;
+    # the buffer stops werkzeug's stream from being read a byte at a time
+    lines = io.BufferedReader(request.stream, buffer_size=64 * 1024)
+    report = import_lines(lines, batch_size, dry_run)
+    return jsonify(report.to_dict()), 200
+
+@api.route("/images", methods=["POST"])
+@admin_required
+def upload_image():
+    max_bytes = current_app.config["IMAGE_MAX_UPLOAD_MB"] * 1024 * 1024
+    if request.content_length is not None and request.content_length > max_bytes:
+        return jsonify({"error": f"Images are limited to {current_app.config['IMAGE_MAX_UPLOAD_MB']} MB"}), 413
+
+    # Either a multipart form with an "image" file or the raw image as the body
+    upload = request.files.get("image")
+    data = upload.read(max_bytes + 1) if upload else request.stream.read(max_bytes + 1)
+    if not data:
+        return jsonify({"error": "Image data is required"}), 400
+    if len(data) > max_bytes:
+        return jsonify({"error": f"Images are limited to {current_app.config['IMAGE_MAX_UPLOAD_MB']} MB"}), 413
+
+    try:
+        image_id = image_store.save(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except StoreFull as e:
+        return jsonify({"error": str(e)}), 507
+    except Exception as e:
+        current_app.logger.exception("Failed to store image")
+        return jsonify({"error": "Failed to store image"}), 500
+
+    url = url_for("api.get_image", image_id=image_id)
+    return jsonify({"id": image_id, "url": url, "srcset": image_srcset(url)}), 201
+
+@api.route("/images/<image_id>", methods=["GET"])
+def get_image(image_id):
+    original = image_store.original(image_id)
+    if original is None:
+        return jsonify({"error": "Image not found"}), 404
+    path, mimetype = original
+
+    width = request.args.get("w")
+    if width is not None and image_store.can_resize:
+        try:
+            width = pick_width(int(width))
+        except ValueError:
+            return jsonify({"error": "w must be an integer"}), 400
+        output = request.args.get("format")
+        if output is None:
+            # Vary: Accept below keeps shared caches from mixing the two
+            output = "webp" if request.accept_mimetypes.quality("image/webp") > 0 else "jpeg"
+        elif output not in FORMATS:
+            return jsonify({"error": f"format must be one of {', '.join(FORMATS)}"}), 400
+        try:
+            data, etag = image_store.variant(image_id, path, width, output)
+        except Exception as e:
+            current_app.logger.exception("Failed to resize image")
+            return jsonify({"error": "Failed to resize image"}), 500
+        response = current_app.response_class(data, mimetype=FORMATS[output][1])
+        response.set_etag(etag)
+        response.make_conditional(request)
+    else:
+        response = send_file(path, mimetype=mimetype, etag=image_id, conditional=True, max_age=IMAGE_MAX_AGE)
+
+    # Content addressed, so a URL always means the same bytes
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_MAX_AGE
+    response.cache_control.immutable = True
+    response.vary.add("Accept")
+    return response
+
 @api.route("/projects", methods=["POST"])
+@retry_on_locked
 def add_project():
     data = request.json
     errors = Project.validate(data)
@@ -48,21 +304,32 @@ def add_project():
             github_url=data.get("github_url")
         )
         db.session.add(project)
+        db.session.flush()
+        record_change(project.id, "created", project)
         db.session.commit()
         return jsonify(project.to_dict()), 201
     except Exception as e:
         db.session.rollback()
+        if is_database_locked(e):
+            raise
+        current_app.logger.exception("Failed to create project")
         return jsonify({"error": "Failed to create project"}), 500
 
 @api.route("/projects/<int:project_id>", methods=["GET"])
+@versioned
 def get_project(project_id):
     try:
         project = Project.query.get_or_404(project_id)
         return jsonify(project.to_dict()), 200
+    except HTTPException:
+        # get_or_404: a missing project is a 404, not a failure
+        raise
     except Exception as e:
+        current_app.logger.exception("Failed to fetch project details")
         return jsonify({"error": "Failed to fetch project details"}), 500
 
 @api.route("/projects/<int:project_id>", methods=["PUT"])
+@retry_on_locked
 def update_project(project_id):
     project = Project.query.get_or_404(project_id)
     data = request.json or {}
@@ -79,19 +346,35 @@ def update_project(project_id):
         if "github_url" in data:
             project.github_url = data["github_url"]
 
+        record_change(project.id, "updated", project)
         db.session.commit()
         return jsonify(project.to_dict()), 200
     except Exception as e:
         db.session.rollback()
+        if is_database_locked(e):
+            raise
+        current_app.logger.exception("Failed to update project")
         return jsonify({"error": "Failed to update project"}), 500
 
 @api.route("/projects/<int:project_id>", methods=["DELETE"])
+@retry_on_locked
 def delete_project(project_id):
     try:
         project = Project.query.get_or_404(project_id)
         db.session.delete(project)
+        record_change(project_id, "deleted")
+        ProjectChange.compact(timedelta(days=current_app.config["TOMBSTONE_RETENTION_DAYS"]))
         db.session.commit()
         return jsonify({"message": "Project deleted successfully"}), 200
+    except HTTPException:
+        raise
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": f"Failed to delete project: {str(e)}"}), 500 
\ No newline at end of file
+        if is_database_locked(e):
+            raise
+        current_app.logger.exception("Failed to delete project")
+        return jsonify({"error": f"Failed to delete project: {str(e)}"}), 500
+
+@api.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
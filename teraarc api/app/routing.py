@@ -0,0 +1,26 @@
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+# SQLALCHEMY_BINDS key of the read replica
+READ_BIND = "replica"
+READ_METHODS = {"GET", "HEAD"}
+
+class RoutingSession(Session):
+    # Queries that would go to the primary are sent to the replica bind while
+    # serving a GET/HEAD request. Flushes, other methods, work outside a
+    # request and requests pinned by read_from_primary() stay on the primary
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self._flushing or not reads_from_replica():
+            return engine
+        engines = self._db.engines
+        if engine is engines.get(None) and READ_BIND in engines:
+            return engines[READ_BIND]
+        return engine
+
+def reads_from_replica():
+    return has_request_context() and request.method in READ_METHODS and not g.get("_read_primary", False)
+
+def read_from_primary():
+    # For the rest of this request, e.g. when the replica is behind the client
+    g._read_primary = True
@@ -0,0 +1,69 @@
+import html
+import re
+from .models import db, Project
+
+# FTS5 marks matches with control characters, not tags: the stored text is
+# HTML-escaped first and only then are the markers turned into <mark>
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# Column weights for bm25(): title matches count ten times a description match
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+SEARCH_SQL = db.text("""
+    SELECT rowid AS id,
+           highlight(projects_fts, 0, :start, :end) AS title,
+           snippet(projects_fts, 1, :start, :end, '…', 24) AS description,
+           bm25(projects_fts, :title_weight, :description_weight) AS score
+    FROM projects_fts
+    WHERE projects_fts MATCH :query
+    ORDER BY score
+    LIMIT :limit OFFSET :offset
+""")
+
+def build_match_query(text):
+    # Quote every term so user input can never be parsed as FTS5 syntax,
+    # and prefix-match the terms for search-as-you-type
+    terms = re.findall(r"\w+", text)
+    return " ".join(f'"{term}"*' for term in terms)
+
+def render_highlight(text):
+    if text is None:
+        return None
+    return html.escape(text).replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_END, HIGHLIGHT_END)
+
+def search_projects(text, limit, offset=0):
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    rows = db.session.execute(SEARCH_SQL, {
+        "start": MATCH_START,
+        "end": MATCH_END,
+        "title_weight": TITLE_WEIGHT,
+        "description_weight": DESCRIPTION_WEIGHT,
+        "query": match,
+        "limit": limit,
+        "offset": offset,
+    }).all()
+    if not rows:
+        return []
+
+    projects = {p.id: p for p in Project.query.filter(Project.id.in_([r.id for r in rows]))}
+    results = []
+    for row in rows:
+        project = projects.get(row.id)
+        if project is None:
+            continue
+        result = project.to_dict()
+        result["highlight"] = {
+            "title": render_highlight(row.title),
+            "description": render_highlight(row.description),
+        }
+        # bm25() is lower-is-better; flip it so clients can sort descending
+        result["score"] = -row.score
+        results.append(result)
+    return results
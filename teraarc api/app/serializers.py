@@ -0,0 +1,75 @@
+import json
+import logging
+from datetime import date
+from flask.json.provider import DefaultJSONProvider, _default as flask_default
+from sqlalchemy import cast, select
+from .models import db, Project
+from .images import image_srcset
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used instead
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+projects_table = Project.__table__
+
+def default(value):
+    # ISO 8601 like Project.to_dict(), rather than Flask's HTTP dates
+    if isinstance(value, date):
+        return value.isoformat()
+    return flask_default(value)
+
+class FastJSONProvider(DefaultJSONProvider):
+    use_orjson = orjson is not None
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_SORT_KEYS).decode()
+        kwargs.setdefault("default", default)
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.use_orjson:
+            body = orjson.dumps(obj, default=default, option=orjson.OPT_SORT_KEYS)
+        else:
+            body = json.dumps(
+                obj,
+                default=default,
+                ensure_ascii=self.ensure_ascii,
+                sort_keys=self.sort_keys,
+                separators=(",", ":")
+            )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_json(app):
+    provider = FastJSONProvider(app)
+    encoder = app.config["JSON_ENCODER"]
+    if encoder == "json":
+        provider.use_orjson = False
+    elif encoder == "orjson" and orjson is None:
+        logger.warning("JSON_ENCODER is 'orjson' but orjson is not installed, using json")
+    app.json = provider
+
+def project_select(fields=None, *extra_columns):
+    # Plain rows of only the requested columns, labelled with their API
+    # names, so no ORM objects or identity map are involved
+    keys = list(Project.API_FIELDS) if fields is None else list(fields)
+    columns = []
+    for key in keys:
+        column = projects_table.c[Project.API_FIELDS[key]]
+        if key == "id":
+            column = cast(column, db.String)
+        columns.append(column.label(key))
+    return keys, select(*columns, *extra_columns)
+
+def rows_to_dicts(keys, rows):
+    # zip() stops at the last key, dropping any trailing extra columns
+    dicts = [dict(zip(keys, row)) for row in rows]
+    # Derived like in Project.to_dict(), so both read paths agree
+    if "imageUrl" in keys:
+        for data in dicts:
+            data["imageSrcset"] = image_srcset(data["imageUrl"])
+    return dicts
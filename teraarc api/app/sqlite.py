@@ -0,0 +1,88 @@
+import os
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from .models import db
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+def configure_sqlite(app, engines):
+    if not app.config["SQLITE_TUNING"]:
+        return
+    pragmas = app.config["SQLITE_PRAGMAS"]
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            register_events(engine, pragmas)
+
+def register_events(engine, pragmas):
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # Take over transaction control from pysqlite so writes can BEGIN IMMEDIATE
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def on_begin(conn):
+        # Writers take the write lock up front and queue on busy_timeout,
+        # instead of failing when a read lock cannot be upgraded
+        if (has_request_context() and request.method in WRITE_METHODS) or (has_app_context() and g.get("_write_transaction")):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            conn.exec_driver_sql("BEGIN")
+
+@contextmanager
+def write_transaction():
+    # For background writes, which have no POST/PUT/DELETE request to go by
+    g._write_transaction = True
+    try:
+        yield
+    finally:
+        g._write_transaction = False
+
+def dispose_after_fork(engines):
+    # Pooled connections opened before a fork (gunicorn preload_app) belong
+    # to the parent. Children drop them without closing, so the parent's
+    # SQLite handles and locks are left alone, and open their own
+    def reset():
+        for engine in engines:
+            engine.dispose(close=False)
+    os.register_at_fork(after_in_child=reset)
+
+def is_database_locked(error):
+    return isinstance(error, OperationalError) and (
+        "database is locked" in str(error.orig) or "database is busy" in str(error.orig)
+    )
+
+def call_with_retry(fn):
+    attempts = current_app.config["WRITE_RETRY_ATTEMPTS"]
+    backoff = current_app.config["WRITE_RETRY_BACKOFF_MS"] / 1000
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except OperationalError as e:
+            if not is_database_locked(e) or attempt == attempts - 1:
+                raise
+            db.session.rollback()
+            # Exponential backoff with jitter so retries do not collide
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+def retry_on_locked(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return call_with_retry(lambda: f(*args, **kwargs))
+        except OperationalError as e:
+            if not is_database_locked(e):
+                raise
+            db.session.rollback()
+        response = jsonify({"error": "Database is busy, please retry"})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    return decorated_function
@@ -0,0 +1,72 @@
+from sqlalchemy import tuple_
+from .models import db, DataVersion, ProjectChange
+from .serializers import projects_table, project_select, rows_to_dicts
+
+def parse_token(token):
+    # Tokens are "<version>" or "<version>.<project_id>" when a page ended
+    # part-way through a version written by a batch
+    try:
+        version, _, project_id = token.partition(".")
+        version = int(version)
+        project_id = int(project_id) if project_id else None
+    except ValueError:
+        raise ValueError("Invalid change token")
+    if version < 0 or (project_id is not None and project_id < 0):
+        raise ValueError("Invalid change token")
+    return version, project_id
+
+def snapshot():
+    version = db.session.get(DataVersion, 1)
+    keys, query = project_select()
+    rows = db.session.execute(query.order_by(projects_table.c.id)).all()
+    return {
+        "token": str(version.version if version else 0),
+        "reset": True,
+        "upserted": rows_to_dicts(keys, rows),
+        "deleted": [],
+        "hasMore": False,
+    }
+
+def changes_since(token, limit):
+    if not token:
+        return snapshot()
+
+    version, project_id = parse_token(token)
+    state = db.session.get(DataVersion, 1)
+    # Tombstones older than the client's token may be gone, start over
+    if version == 0 or version < state.compacted_version:
+        return snapshot()
+
+    if project_id is None:
+        after = ProjectChange.version > version
+    else:
+        after = tuple_(ProjectChange.version, ProjectChange.project_id) > (version, project_id)
+
+    rows = db.session.execute(
+        db.select(ProjectChange)
+        .where(after)
+        .order_by(ProjectChange.version, ProjectChange.project_id)
+        .limit(limit + 1)
+    ).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    upserted_ids = [r.project_id for r in rows if not r.deleted]
+    projects = {}
+    if upserted_ids:
+        keys, query = project_select()
+        found = db.session.execute(query.where(projects_table.c.id.in_(upserted_ids))).all()
+        projects = {int(p["id"]): p for p in rows_to_dicts(keys, found)}
+
+    if has_more:
+        next_token = f"{rows[-1].version}.{rows[-1].project_id}"
+    else:
+        next_token = str(state.version)
+
+    return {
+        "token": next_token,
+        "reset": False,
+        "upserted": [projects[pid] for pid in upserted_ids if pid in projects],
+        "deleted": [str(r.project_id) for r in rows if r.deleted],
+        "hasMore": has_more,
+    }
@@ -1,6 +1,10 @@
+import base64
+import json
+from datetime import datetime
 from functools import wraps
 from flask import request, jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from .models import Project
 
 def validate_request(f):
     @wraps(f)
@@ -14,8 +18,66 @@ def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         verify_jwt_in_request()
-        current_user = get_jwt_identity()
-        if not current_user.get('is_admin', False):
+        if not get_jwt().get('is_admin', False):
             return jsonify({"error": "Admin privileges required"}), 403
         return f(*args, **kwargs)
-    return decorated_function 
\ No newline at end of file
+    return decorated_function
+
+def encode_cursor(sort_key, value, project_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort_key, value, project_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, sort_key):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, project_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort_key or not isinstance(project_id, int):
+        raise ValueError("Cursor does not match the requested sort")
+    column = getattr(Project, Project.SORT_KEYS[sort_key])
+    if column.type.python_type is datetime:
+        try:
+            value = datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+    return value, project_id
+
+def parse_list_args(args, max_limit):
+    fields = None
+    if args.get("fields"):
+        fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+        unknown = [f for f in fields if f not in Project.API_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    sort = args.get("sort", "created_at")
+    descending = sort.startswith("-")
+    sort_key = sort.lstrip("-")
+    if sort_key not in Project.SORT_KEYS:
+        raise ValueError(f"Unsupported sort key: {sort_key}")
+
+    limit = None
+    if "limit" in args or "cursor" in args:
+        try:
+            limit = int(args.get("limit", max_limit))
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        limit = min(limit, max_limit)
+
+    after = None
+    if args.get("cursor"):
+        after = decode_cursor(args["cursor"], sort_key)
+
+    return {
+        "fields": fields,
+        "sort": sort,
+        "sort_key": sort_key,
+        "descending": descending,
+        "limit": limit,
+        "after": after,
+    }
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from . import common
+
+common.configure_environment()
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def timed(call, iterations, max_seconds, before=None):
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        status = call()
+        latencies.append(time.perf_counter() - t0)
+        if not 200 <= status < 400:
+            errors += 1
+        if time.perf_counter() - started > max_seconds:
+            break
+    return common.summarize(latencies, time.perf_counter() - started, errors)
+
+def bench_in_process(app, size, args):
+    from app.cache import response_cache
+    from app.models import DataVersion
+
+    client = app.test_client()
+    rng = random.Random(size)
+    with app.app_context():
+        version = DataVersion.current()
+
+    def new_project():
+        return common.make_project(rng, rng.randrange(10 ** 9))
+
+    def create_and_delete():
+        response = client.post("/api/projects", json=new_project())
+        return client.delete(f"/api/projects/{response.json['id']}").status_code
+
+    reads = {
+        "list_all": lambda: client.get("/api/projects").status_code,
+        "list_page": lambda: client.get("/api/projects?limit=50&fields=id,title").status_code,
+        "list_sorted_page": lambda: client.get("/api/projects?limit=50&sort=-title").status_code,
+        "get_one": lambda: client.get(f"/api/projects/{rng.randint(1, size)}").status_code,
+        "search": lambda: client.get(f"/api/projects/search?q={rng.choice(common.WORDS)}").status_code,
+        "changes": lambda: client.get(f"/api/projects/changes?since={version}").status_code,
+    }
+    writes = {
+        "create": lambda: client.post("/api/projects", json=new_project()).status_code,
+        "update": lambda: client.put(f"/api/projects/{rng.randint(1, size)}", json={"title": f"Renamed {rng.random()}"}).status_code,
+        "create_delete": create_and_delete,
+    }
+
+    results = {}
+    for name, call in reads.items():
+        # Cold clears the per-worker response cache first, warm reuses it
+        results[f"{size}/inproc/{name}/cold"] = timed(call, args.iterations, args.max_seconds, before=response_cache.clear)
+        results[f"{size}/inproc/{name}/warm"] = timed(call, args.iterations, args.max_seconds)
+    for name, call in writes.items():
+        results[f"{size}/inproc/{name}"] = timed(call, args.iterations, args.max_seconds)
+    return results
+
+def http_operations(client, size):
+    def get(path):
+        return lambda rng: client.request("GET", path(rng))[0]
+
+    return {
+        "list_all": get(lambda rng: "/api/projects"),
+        "list_page": get(lambda rng: "/api/projects?limit=50&fields=id,title"),
+        "get_one": get(lambda rng: f"/api/projects/{rng.randint(1, size)}"),
+        "search": get(lambda rng: f"/api/projects/search?q={rng.choice(common.WORDS)}"),
+        "changes": get(lambda rng: "/api/projects/changes?since=1"),
+        "create": lambda rng: client.request("POST", "/api/projects", common.make_project(rng, rng.randrange(10 ** 9)))[0],
+        "update": lambda rng: client.request("PUT", f"/api/projects/{rng.randint(1, size)}", {"title": f"Renamed {rng.random()}"})[0],
+    }
+
+WORKLOADS = {
+    "read_only": {"list_all": 5, "list_page": 40, "get_one": 30, "search": 15, "changes": 10},
+    "mixed": {"list_all": 5, "list_page": 35, "get_one": 25, "search": 15, "changes": 10, "create": 5, "update": 5},
+}
+
+def bench_http(size, args):
+    results = {}
+    memory = {}
+    for workload, weights in WORKLOADS.items():
+        with common.Gunicorn(workers=args.workers, threads=args.gunicorn_threads) as server:
+            client = common.HttpClient("127.0.0.1", server.port)
+            operations = http_operations(client, size)
+            mix = [(name, weight, operations[name]) for name, weight in weights.items()]
+            run = common.run_concurrent(mix, args.threads, args.duration)
+            memory[f"{size}/http/{workload}"] = server.peak_rss_kb()
+        for name, summary in run.items():
+            results[f"{size}/http/{workload}/{name}"] = summary
+    return results, memory
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and throughput benchmarks for the TeraArc API.")
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma separated catalog sizes to seed (up to 100000)")
+    parser.add_argument("--iterations", type=int, default=200, help="requests per in-process scenario")
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="time cap per in-process scenario")
+    parser.add_argument("--http", action="store_true", help="also drive gunicorn over HTTP")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--gunicorn-threads", type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent client threads for HTTP runs")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per HTTP workload")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression before failing")
+    parser.add_argument("--output", help="write the full results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    memory = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"Seeding {size} projects...", file=sys.stderr)
+        app = common.seed(size)
+        results.update(bench_in_process(app, size, args))
+        if args.http:
+            # Reseed so the HTTP run does not see the in-process writes
+            common.seed(size)
+            http_results, http_memory = bench_http(size, args)
+            results.update(http_results)
+            memory.update(http_memory)
+    memory["inproc/peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    common.print_table(results)
+    for key, value in memory.items():
+        print(f"{key}: {value}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "memory": memory}, f, indent=2)
+
+    if args.save_baseline:
+        # Numbers only compare on similar hardware, so the file records
+        # what produced them; the comparison skips this entry
+        meta = {
+            "command": " ".join(["python -m benchmarks.bench_api"] + sys.argv[1:]),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "recorded": time.strftime("%Y-%m-%d"),
+        }
+        with open(args.baseline, "w") as f:
+            json.dump(dict(results, _meta=meta), f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = common.compare_to_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import argparse
+import gzip
+import os
+import re
+import shutil
+import tempfile
+from . import common
+
+common.configure_environment()
+
+PAGES = ("index.html", "about.html", "services.html", "projects.html", "contact.html")
+ASSET_PATTERN = re.compile(r"""\b(?:href|src)=["']([^"'#?:]+\.(?:css|js))["']""")
+
+class Browser:
+    # Just enough of an HTTP cache: fresh immutable entries are reused
+    # without a request, everything else is revalidated with its validators
+    def __init__(self, client, accept_encoding):
+        self.client = client
+        self.accept_encoding = accept_encoding
+        self.cache = {}
+        self.requests = 0
+        self.bytes = 0
+
+    def get(self, path):
+        cached = self.cache.get(path)
+        if cached is not None and cached["immutable"]:
+            return cached["body"]
+        headers = {"Accept-Encoding": self.accept_encoding}
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        response = self.client.get(path, headers=headers)
+        self.requests += 1
+        # Bytes on the wire: headers are left out, they are the same either way
+        self.bytes += len(response.get_data())
+        if response.status_code == 304:
+            return cached["body"]
+        body = response.get_data()
+        encoding = response.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "br":
+            from app.assets import brotli
+            body = brotli.decompress(body)
+        self.cache[path] = {
+            "body": body,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "immutable": "immutable" in response.headers.get("Cache-Control", ""),
+        }
+        return body
+
+    def visit(self, page):
+        html = self.get(f"/{page}").decode("utf-8")
+        for asset in ASSET_PATTERN.findall(html):
+            self.get(f"/{asset}")
+
+    def reset_counters(self):
+        self.requests = 0
+        self.bytes = 0
+
+def measure(app, accept_encoding):
+    browser = Browser(app.test_client(), accept_encoding)
+    results = {}
+    for visit in ("first", "repeat"):
+        browser.reset_counters()
+        for page in PAGES:
+            browser.visit(page)
+        results[visit] = (browser.requests, browser.bytes)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Transfer size and requests for every page, before and after flask build-assets.")
+    parser.add_argument("--projects", type=int, default=50, help="projects rendered into projects.html")
+    parser.add_argument("--accept-encoding", default="gzip, br", help="what the simulated browser advertises")
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix="teraarc-assets-")
+    os.environ["ASSETS_DIR"] = os.path.join(output_dir, "assets")
+    try:
+        app = common.seed(args.projects)
+        app.config["ASSETS_DIR"] = os.environ["ASSETS_DIR"]
+        before = measure(app, args.accept_encoding)
+
+        from app.assets import build
+        build(app.config["FRONTEND_DIR"], app.config["ASSETS_DIR"])
+        after = measure(app, args.accept_encoding)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    print(f"{'visit':<8} {'build':<8} {'requests':>9} {'bytes':>10}")
+    for visit in ("first", "repeat"):
+        for label, results in (("raw", before), ("built", after)):
+            requests, size = results[visit]
+            print(f"{visit:<8} {label:<8} {requests:>9} {size:>10}")
+        saved = f"{1 - after[visit][1] / before[visit][1]:.0%}" if before[visit][1] else "-"
+        print(f"{'':<8} {'saving':<8} {before[visit][0] - after[visit][0]:>9} {saved:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import json
+import sys
+import time
+from . import common
+
+common.configure_environment()
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Rows/sec of Project.to_dict() + jsonify versus the lean Core read path.")
+    parser.add_argument("--sizes", default="10000,100000", help="comma separated row counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, best is reported")
+    args = parser.parse_args()
+
+    from app.models import db, Project
+    from app.serializers import FastJSONProvider, default, orjson, project_select, rows_to_dicts
+
+    print(f"{'rows':>8} {'path':<28} {'build s':>9} {'encode s':>9} {'rows/s':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        app = common.seed(size)
+        with app.app_context():
+            def orm_rows():
+                db.session.expunge_all()
+                return [p.to_dict() for p in Project.query.all()]
+
+            def lean_rows():
+                keys, query = project_select()
+                return rows_to_dicts(keys, db.session.execute(query).all())
+
+            encoders = {
+                # What jsonify() did before: Flask's default provider, stdlib json
+                "stdlib": lambda data: json.dumps(data, default=default, sort_keys=True, separators=(",", ":")).encode(),
+            }
+            if orjson is not None:
+                encoders["orjson"] = lambda data: orjson.dumps(data, default=default, option=orjson.OPT_SORT_KEYS)
+
+            paths = [("orm to_dict + stdlib", orm_rows, "stdlib")]
+            paths += [(f"core rows + {name}", lean_rows, name) for name in encoders]
+            for label, build, encoder in paths:
+                data = build()
+                build_time = best_of(args.repeat, build)
+                encode_time = best_of(args.repeat, lambda: encoders[encoder](data))
+                total = build_time + encode_time
+                print(f"{size:>8} {label:<28} {build_time:>9.3f} {encode_time:>9.3f} {size / total:>12,.0f}")
+    print(f"FastJSONProvider uses {'orjson' if FastJSONProvider.use_orjson else 'stdlib json'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
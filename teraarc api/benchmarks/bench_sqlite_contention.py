@@ -0,0 +1,73 @@
+import argparse
+import sqlite3
+import sys
+import threading
+from . import common
+
+common.configure_environment()
+
+def run_mode(tuned, args):
+    from app.models import db
+
+    app = common.seed(args.size)
+    with app.app_context():
+        db.engine.dispose()
+    if not tuned:
+        # Seeding ran with the tuned profile; put the file back in rollback-journal mode
+        with sqlite3.connect(common.DB_PATH) as conn:
+            conn.execute("PRAGMA journal_mode = DELETE")
+
+    env = {"SQLITE_TUNING": "1" if tuned else "0"}
+    with common.Gunicorn(workers=args.workers, threads=args.gunicorn_threads, extra_env=env) as server:
+        client = common.HttpClient("127.0.0.1", server.port)
+        readers = [
+            ("list_page", 60, lambda rng: client.request("GET", "/api/projects?limit=50&sort=-title&fields=id,title")[0]),
+            ("get_one", 40, lambda rng: client.request("GET", f"/api/projects/{rng.randint(1, args.size)}")[0]),
+        ]
+        writers = [
+            ("update", 80, lambda rng: client.request("PUT", f"/api/projects/{rng.randint(1, args.size)}", {"title": f"Renamed {rng.random()}"})[0]),
+            ("create", 20, lambda rng: client.request("POST", "/api/projects", common.make_project(rng, rng.randrange(10 ** 9)))[0]),
+        ]
+        results = {}
+
+        def run(name, operations, threads):
+            results[name] = common.run_concurrent(operations, threads, args.duration)
+
+        # Readers and writers hammer the same file at the same time
+        pool = [
+            threading.Thread(target=run, args=("reads", readers, args.readers)),
+            threading.Thread(target=run, args=("writes", writers, args.writers)),
+        ]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Read throughput under concurrent writes, with and without SQLite tuning.")
+    parser.add_argument("--size", type=int, default=10000, help="projects to seed")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument("--gunicorn-threads", type=int, default=2, help="gunicorn threads per worker")
+    parser.add_argument("--readers", type=int, default=8, help="concurrent reader threads")
+    parser.add_argument("--writers", type=int, default=4, help="concurrent writer threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    args = parser.parse_args()
+
+    summary = {}
+    for label, tuned in (("before", False), ("after", True)):
+        print(f"Running {label} (SQLITE_TUNING={int(tuned)})...", file=sys.stderr)
+        results = run_mode(tuned, args)
+        for group in ("reads", "writes"):
+            for name, row in results[group].items():
+                summary[f"{label}/{group}/{name}"] = row
+
+    common.print_table(summary)
+    before, after = summary["before/reads/total"], summary["after/reads/total"]
+    if before["rps"]:
+        print(f"Read throughput during writes: {before['rps']:.0f}/s -> {after['rps']:.0f}/s ({after['rps'] / before['rps']:.2f}x)")
+    print(f"Failed writes: {summary['before/writes/total']['errors']} -> {summary['after/writes/total']['errors']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from . import common
+
+common.configure_environment()
+
+GUNICORN_CONFIG = os.path.join(common.API_DIR, "gunicorn.conf.py")
+
+# How every worker started before the production path: tables created and
+# inspected on boot, Flask-Migrate (and alembic) imported with the app
+STARTUP_MODES = (
+    ("create_all", {"DB_CREATE_ON_STARTUP": "1"}, "import flask_migrate, run"),
+    ("verify", {"DB_CREATE_ON_STARTUP": "0"}, "import run"),
+)
+
+def production_env(**extra):
+    return dict(
+        FLASK_ENV="production",
+        FLASK_DEBUG="0",
+        DATABASE_URL=common.DB_URL,
+        RATE_LIMIT_ENABLED="0",
+        **extra,
+    )
+
+def prepare_database(projects):
+    from flask_migrate import stamp
+    from app import init_migrate
+
+    app = common.seed(projects)
+    init_migrate(app)
+    with app.app_context():
+        # Seeded through create_all, which matches the latest migration
+        stamp(directory=app.config["MIGRATIONS_DIR"])
+
+def cold_start(statement, env, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=common.API_DIR, env=dict(os.environ, **env), check=True)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def measure_workers(preload, args):
+    env = production_env(GUNICORN_PRELOAD="1" if preload else "0")
+    with common.Gunicorn(workers=args.workers, threads=args.threads, extra_env=env, config=GUNICORN_CONFIG) as server:
+        client = common.HttpClient("127.0.0.1", server.port)
+        # Touch every worker so lazily imported code and caches are resident
+        for _ in range(args.warmup):
+            client.request("GET", "/api/projects?limit=20")
+        workers = [common.memory_kb(pid) for pid in common.child_pids(server.process.pid)]
+        master = common.memory_kb(server.process.pid)
+    return {
+        "startup_s": server.startup_seconds,
+        "master": master,
+        "worker_rss_kb": statistics.mean(w["rss_kb"] for w in workers),
+        "worker_private_kb": statistics.mean(w["private_kb"] for w in workers),
+        "total_pss_kb": master["pss_kb"] + sum(w["pss_kb"] for w in workers),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time and per-worker memory of the production startup path.")
+    parser.add_argument("--projects", type=int, default=1000, help="projects to seed")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per mode, the median is reported")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--warmup", type=int, default=200, help="requests sent before memory is read")
+    args = parser.parse_args()
+
+    prepare_database(args.projects)
+
+    print(f"{'app startup':<14} {'median ms':>10}")
+    for label, env, statement in STARTUP_MODES:
+        seconds = cold_start(statement, production_env(**env), args.runs)
+        print(f"{label:<14} {seconds * 1000:>10.0f}")
+
+    print()
+    print(f"{'gunicorn':<14} {'ready ms':>10} {'worker rss':>11} {'private':>9} {'total pss':>10}")
+    for label, preload in (("no preload", False), ("preload", True)):
+        row = measure_workers(preload, args)
+        print(
+            f"{label:<14} {row['startup_s'] * 1000:>10.0f} {row['worker_rss_kb'] / 1024:>9.1f}MB "
+            f"{row['worker_private_kb'] / 1024:>7.1f}MB {row['total_pss_kb'] / 1024:>8.1f}MB"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = os.getenv("BENCH_WORK_DIR", os.path.join(tempfile.gettempdir(), "teraarc-bench"))
+DB_PATH = os.path.join(WORK_DIR, "bench.db")
+DB_URL = f"sqlite:///{DB_PATH}"
+
+WORDS = (
+    "api cloud mobile web dashboard analytics portal commerce booking chat "
+    "inventory payment school clinic travel fitness music video maps crm "
+    "flutter react flask django android ios realtime ai vision search"
+).split()
+
+def configure_environment():
+    # Must run before the app package is imported, config reads env at import
+    os.makedirs(WORK_DIR, exist_ok=True)
+    os.environ["TEST_DATABASE_URL"] = DB_URL
+    os.environ.setdefault("METRICS_DIR", os.path.join(WORK_DIR, "metrics"))
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+
+def reset_database():
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(DB_PATH + suffix)
+        except FileNotFoundError:
+            pass
+
+def make_project(rng, index):
+    title = " ".join(rng.choice(WORDS).capitalize() for _ in range(3))
+    return {
+        "title": f"{title} {index}",
+        "description": " ".join(rng.choice(WORDS) for _ in range(80)),
+        "image_url": f"https://images.example.com/{index}.jpg",
+        "video_url": None,
+        "github_url": f"https://github.com/teraarc/project-{index}",
+    }
+
+def seed(count, batch_size=5000):
+    from app import create_app
+    from app.models import db, Project, DataVersion
+
+    reset_database()
+    app = create_app("testing")
+    rng = random.Random(count)
+    start = datetime.utcnow() - timedelta(seconds=count)
+    with app.app_context():
+        for offset in range(0, count, batch_size):
+            rows = []
+            for index in range(offset, min(offset + batch_size, count)):
+                row = make_project(rng, index)
+                row["created_at"] = row["updated_at"] = start + timedelta(seconds=index)
+                rows.append(row)
+            db.session.execute(db.insert(Project), rows)
+        DataVersion.bump()
+        db.session.commit()
+    return app
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies, wall_time, errors=0):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "rps": len(values) / wall_time if wall_time else 0.0,
+    }
+
+def peak_rss_kb(pid):
+    # VmHWM is the high-water mark of resident memory (Linux only)
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def memory_kb(pid):
+    # Rss counts pages shared with the master and siblings in full; Pss splits
+    # them between sharers and Private is what the process alone holds
+    usage = {"rss_kb": 0, "pss_kb": 0, "private_kb": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name == "Rss":
+                    usage["rss_kb"] = int(value.split()[0])
+                elif name == "Pss":
+                    usage["pss_kb"] = int(value.split()[0])
+                elif name in ("Private_Clean", "Private_Dirty"):
+                    usage["private_kb"] += int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+# Loaded instead of gunicorn.conf.py, so benchmarks control every setting
+BENCH_GUNICORN_CONFIG = os.path.join(API_DIR, "benchmarks", "gunicorn_bench.conf.py")
+
+class Gunicorn:
+    # config=None uses the empty BENCH_GUNICORN_CONFIG
+    def __init__(self, workers=2, threads=1, extra_env=None, config=None, extra_args=()):
+        self.workers = workers
+        self.threads = threads
+        self.port = free_port()
+        self.extra_env = extra_env or {}
+        self.config = config
+        self.extra_args = list(extra_args)
+        self.process = None
+        self.startup_seconds = None
+
+    def __enter__(self):
+        env = dict(os.environ, FLASK_ENV="testing", FLASK_DEBUG="0")
+        env.update(self.extra_env)
+        started = time.monotonic()
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn",
+                "--config", self.config or BENCH_GUNICORN_CONFIG,
+                "--workers", str(self.workers),
+                "--threads", str(self.threads),
+                "--bind", f"127.0.0.1:{self.port}",
+                "--log-level", "warning",
+                *self.extra_args,
+                "run:app",
+            ],
+            cwd=API_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("gunicorn exited during startup")
+            try:
+                status, _ = HttpClient("127.0.0.1", self.port).request("GET", "/api/projects?limit=1")
+                if status == 200:
+                    self.startup_seconds = time.monotonic() - started
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("gunicorn did not become ready")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+    def peak_rss_kb(self):
+        pids = [self.process.pid] + child_pids(self.process.pid)
+        per_process = [peak_rss_kb(pid) for pid in pids]
+        return {"total_kb": sum(per_process), "max_worker_kb": max(per_process[1:] or [0])}
+
+class HttpClient:
+    def __init__(self, host, port, timeout=30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def connection(self):
+        # One keep-alive connection per driver thread
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, body=None):
+        headers = {}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        conn = self.connection()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self.local.conn = None
+            raise
+        return response.status, data
+
+def run_concurrent(operations, threads, duration):
+    # operations: list of (name, weight, callable returning an HTTP status)
+    names = [name for name, _, _ in operations]
+    weights = [weight for _, weight, _ in operations]
+    calls = {name: call for name, _, call in operations}
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = {name: [] for name in names}
+        local_errors = {name: 0 for name in names}
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = calls[name](rng)
+            except OSError:
+                status = 0
+            elapsed = time.perf_counter() - started
+            if 200 <= status < 400:
+                local[name].append(elapsed)
+            else:
+                local_errors[name] += 1
+        with lock:
+            for name in names:
+                latencies[name].extend(local[name])
+                errors[name] += local_errors[name]
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall_time = time.perf_counter() - started
+
+    results = {name: summarize(latencies[name], wall_time, errors[name]) for name in names}
+    everything = [value for values in latencies.values() for value in values]
+    results["total"] = summarize(everything, wall_time, sum(errors.values()))
+    return results
+
+def compare_to_baseline(results, baseline, tolerance):
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or not isinstance(current, dict) or "p95_ms" not in current:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {previous['p95_ms']:.2f} ms -> {current['p95_ms']:.2f} ms")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {previous['rps']:.0f}/s -> {current['rps']:.0f}/s")
+    return regressions
+
+def print_table(results):
+    print(f"{'benchmark':<48} {'count':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for key, row in results.items():
+        if not isinstance(row, dict) or "p50_ms" not in row:
+            continue
+        print(
+            f"{key:<48} {row['count']:>7} {row['errors']:>5} {row['p50_ms']:>9.2f} "
+            f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['rps']:>9.0f}"
+        )
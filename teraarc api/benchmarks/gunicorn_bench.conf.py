@@ -0,0 +1,2 @@
+# Deliberately empty: benchmarks pass every gunicorn setting on the command
+# line instead of inheriting the production gunicorn.conf.py
@@ -0,0 +1,81 @@
+import os
+from dotenv import load_dotenv
+
+# Loaded by gunicorn from the working directory: gunicorn run:app
+# Every setting can be overridden on the command line or through the
+# GUNICORN_* / WEB_CONCURRENCY environment variables below
+
+os.environ.setdefault("FLASK_ENV", "production")
+# As in run.py: the app's settings below come from the environment
+load_dotenv()
+from app.config import Config
+
+def available_cpus():
+    try:
+        # Respects CPU pinning and container cpusets
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def available_memory_mb():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+def default_workers():
+    # 2 x CPUs + 1, but never more workers than memory comfortably holds
+    workers = 2 * available_cpus() + 1
+    memory = available_memory_mb()
+    if memory is not None:
+        workers = min(workers, max(1, memory // int(os.getenv("GUNICORN_WORKER_MB", 150))))
+    return workers
+
+wsgi_app = "run:app"
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', 5000)}")
+
+workers = int(os.getenv("WEB_CONCURRENCY", 0)) or default_workers()
+# Threads, not more processes: SQLite has a single writer anyway. Each
+# open event stream (/api/projects/stream) holds a thread for its lifetime,
+# so every worker gets one per stream it accepts on top of the request threads
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 0)) or (
+    max(4, 2 * available_cpus() // workers) + Config.SSE_MAX_CLIENTS + Config.SSE_PUBLIC_MAX_CLIENTS
+)
+
+# Import and set up the app once in the master; workers fork from it and
+# share its memory copy-on-write. Engines drop inherited connections after
+# the fork (app.sqlite.dispose_after_fork)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+# Recycle workers now and then, staggered so they never restart together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+
+# Metrics snapshots (app/metrics.py): one file per live worker plus the
+# summed counts of the ones that have exited, reset when the master starts
+def master_metrics():
+    from app.metrics import metrics
+    if metrics.directory is None:
+        # Not preloaded: the app has not been set up in the master
+        metrics.directory = Config.METRICS_DIR
+    return metrics
+
+def on_starting(server):
+    metrics = master_metrics()
+    if os.path.isdir(metrics.directory):
+        metrics.clear()
+
+def worker_exit(server, worker):
+    from app.metrics import metrics
+    metrics.close()
+
+def child_exit(server, worker):
+    master_metrics().retire(worker.pid)
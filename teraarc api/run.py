@@ -1,7 +1,12 @@
 import os
+from dotenv import load_dotenv
+
+# Before the app is imported: config reads the environment at import time
+load_dotenv()
+
 from app import create_app
 
 app = create_app(os.getenv('FLASK_ENV', 'development'))
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000))) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)))